@@ -1,12 +1,18 @@
 from .config import Config
+from .config import ConfigError
+from .config import Settings
 from .core import SlashClient
 from .core import Bot
+from .core import Cluster
 
 __version__ = "0.7.2"
 
 __all__ = [
     "Bot",
+    "Cluster",
     "Config",
+    "ConfigError",
+    "Settings",
     "SlashClient",
     "__version__",
 ]
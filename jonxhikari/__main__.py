@@ -1,13 +1,45 @@
+import argparse
+
 import uvloop
 
 from jonxhikari import __version__
 from jonxhikari import Bot
+from jonxhikari import Cluster
+from jonxhikari import Settings
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="jonxhikari")
+    parser.add_argument(
+        "-w", "--workers", type=int, default=1, help="Worker processes to split shards across."
+    )
+    parser.add_argument(
+        "-s", "--shards", type=int, default=None, help="Total shard count, required with workers."
+    )
+    return parser.parse_args()
 
 
 def main() -> None:
+    args = parse_args()
+
+    # Fails with every config problem at once, before anything starts
+    settings = Settings.from_env()
+
+    if args.workers > 1:
+        if args.shards is None:
+            raise SystemExit("--shards is required when running more than 1 worker.")
+
+        Cluster(
+            __version__,
+            args.workers,
+            args.shards,
+            max_concurrency=Cluster.fetch_max_concurrency(settings.token),
+        ).run()
+        return None
+
     uvloop.install()
-    bot = Bot(__version__)
-    bot.run()
+    bot = Bot(__version__, settings)
+    bot.run(shard_count=args.shards)
 
 
 if __name__ == "__main__":
@@ -4,19 +4,206 @@ from logging.handlers import RotatingFileHandler
 from os import environ
 
 import dotenv
+import hikari
 
 
 dotenv.load_dotenv()
 
+_MISSING: t.Any = object()
+
+
+class Profile(t.NamedTuple):
+    """The gateway intents and hikari cache settings to run with."""
+
+    intents: hikari.Intents
+    cache: hikari.CacheSettings
+
+
+# What each feature needs:
+#   - slash commands, guild registration: GUILDS intent, GUILDS cache
+#   - permission checks (prefix, setstarboard): GUILD_CHANNELS and ROLES cache
+#   - message commands (lightbulb and tanjun prefixes): GUILD_MESSAGES intent
+#   - status emojis (Bot.yes/Bot.no): GUILD_EMOJIS intent, EMOJIS cache
+#   - starboard: GUILD_MESSAGE_REACTIONS intent
+#   - stats user counts: member_count from the GUILDS cache, no member intents
+# Nothing uses presences, voice states, members, invites or cached messages.
+_GUILD_CACHE = (
+    hikari.CacheComponents.GUILDS
+    | hikari.CacheComponents.GUILD_CHANNELS
+    | hikari.CacheComponents.ROLES
+)
+
+PROFILES = {
+    # Slash commands only
+    "minimal": Profile(
+        hikari.Intents.GUILDS,
+        hikari.CacheSettings(components=_GUILD_CACHE),
+    ),
+    # Slash commands with the status emojis
+    "tags-only": Profile(
+        hikari.Intents.GUILDS | hikari.Intents.GUILD_EMOJIS,
+        hikari.CacheSettings(components=_GUILD_CACHE | hikari.CacheComponents.EMOJIS),
+    ),
+    # Every feature, and only what they need
+    "standard": Profile(
+        hikari.Intents.GUILDS
+        | hikari.Intents.GUILD_EMOJIS
+        | hikari.Intents.GUILD_MESSAGES
+        | hikari.Intents.GUILD_MESSAGE_REACTIONS,
+        hikari.CacheSettings(components=_GUILD_CACHE | hikari.CacheComponents.EMOJIS),
+    ),
+    # Everything, hikari's defaults
+    "full": Profile(hikari.Intents.ALL, hikari.CacheSettings()),
+}
+
 
 class DatabaseLoggingFilter(logging.Filter):
     """Filters out Database sync logs."""
 
+    jobs = ("Database.commit", "UsageBuffer.flush")
+
     def filter(self, record: logging.LogRecord) -> bool:
-        return (
-            'Running job "Database.commit' not in (m := record.getMessage())
-            and 'Job "Database.commit' not in m
-        )
+        m = record.getMessage()
+        return not any(f'Running job "{job}' in m or f'Job "{job}' in m for job in self.jobs)
+
+
+class ConfigError(LookupError):
+    """Raised when the config is missing values, or has invalid ones."""
+
+    def __init__(self, errors: list[str]) -> None:
+        self.errors = errors
+        super().__init__("Invalid config:\n" + "\n".join(f" > {e}" for e in errors))
+
+
+def _ids(value: str) -> tuple[int, ...]:
+    return tuple(int(i) for i in value.split(","))
+
+
+def _bool(value: str) -> bool:
+    if value.lower() not in ("1", "0", "true", "false", "yes", "no"):
+        raise ValueError("must be true or false")
+
+    return value.lower() in ("1", "true", "yes")
+
+
+def _profile(value: str) -> Profile:
+    if value not in PROFILES:
+        raise ValueError(f"must be one of: {', '.join(PROFILES)}")
+
+    return PROFILES[value]
+
+
+class Settings:
+    """Typed settings, parsed and validated once at startup.
+
+    Instances are read only. Use `Settings.from_env()` to build one.
+    """
+
+    # attribute: (environment variable, type, default), no default means required
+    FIELDS: dict[str, tuple[str, t.Callable[[str], t.Any], t.Any]] = {
+        "token": ("TOKEN", str, _MISSING),
+        "owner_ids": ("OWNER_IDS", _ids, _MISSING),
+        "home_guild": ("HOME_GUILD", hikari.Snowflake, _MISSING),
+        "cat_api_key": ("CAT_API_KEY", str, ""),
+        "profile": ("PROFILE", _profile, PROFILES["standard"]),
+        "pg_db": ("PG_DB", str, _MISSING),
+        "pg_host": ("PG_HOST", str, _MISSING),
+        "pg_user": ("PG_USER", str, _MISSING),
+        "pg_pass": ("PG_PASS", str, _MISSING),
+        "pg_port": ("PG_PORT", int, _MISSING),
+        "pool_min_size": ("POOL_MIN_SIZE", int, 2),
+        "pool_max_size": ("POOL_MAX_SIZE", int, 10),
+        "pool_acquire_timeout": ("POOL_ACQUIRE_TIMEOUT", float, 5.0),
+        "pool_max_waiting": ("POOL_MAX_WAITING", int, 50),
+        "command_timeout": ("COMMAND_TIMEOUT", float, 30.0),
+        "slow_query_ms": ("SLOW_QUERY_MS", float, 250.0),
+        "explain_slow_queries": ("EXPLAIN_SLOW_QUERIES", _bool, False),
+        "statement_cache_size": ("STATEMENT_CACHE_SIZE", int, 128),
+        "tag_cache_size": ("TAG_CACHE_SIZE", int, 2048),
+        "tag_cache_ttl": ("TAG_CACHE_TTL", float, 600.0),
+        "star_index_size": ("STAR_INDEX_SIZE", int, 4096),
+    }
+
+    __slots__ = tuple(FIELDS)
+
+    token: str
+    owner_ids: tuple[int, ...]
+    home_guild: hikari.Snowflake
+    cat_api_key: str
+    profile: Profile
+    pg_db: str
+    pg_host: str
+    pg_user: str
+    pg_pass: str
+    pg_port: int
+    pool_min_size: int
+    pool_max_size: int
+    pool_acquire_timeout: float
+    pool_max_waiting: int
+    command_timeout: float
+    slow_query_ms: float
+    explain_slow_queries: bool
+    statement_cache_size: int
+    tag_cache_size: int
+    tag_cache_ttl: float
+    star_index_size: int
+
+    def __init__(self, **values: t.Any) -> None:
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name: str, value: t.Any) -> None:
+        raise AttributeError("Settings are read only.")
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """Parses the settings from the environment.
+
+        Raises a `ConfigError` listing every problem, not just the first.
+        """
+        values: dict[str, t.Any] = {}
+        errors: list[str] = []
+
+        for name, (var, type_, default) in cls.FIELDS.items():
+            if var not in environ:
+                if default is _MISSING:
+                    errors.append(f"`{var}` is not defined in config.")
+
+                values[name] = default
+                continue
+
+            try:
+                values[name] = type_(environ[var])
+
+            except ValueError as e:
+                errors.append(f"`{var}` is invalid: {e}")
+
+        for name in (
+            "pool_min_size",
+            "pool_max_size",
+            "pool_max_waiting",
+            "statement_cache_size",
+            "tag_cache_size",
+            "star_index_size",
+        ):
+            if isinstance(v := values.get(name), int) and v < 1:
+                errors.append(f"`{cls.FIELDS[name][0]}` must be at least 1.")
+
+        for name in ("pool_acquire_timeout", "command_timeout"):
+            if isinstance(v := values.get(name), float) and v <= 0:
+                errors.append(f"`{cls.FIELDS[name][0]}` must be more than 0.")
+
+        if (
+            isinstance(low := values.get("pool_min_size"), int)
+            and isinstance(high := values.get("pool_max_size"), int)
+            and low > high
+        ):
+            errors.append("`POOL_MIN_SIZE` can't be larger than `POOL_MAX_SIZE`.")
+
+        if errors:
+            raise ConfigError(errors)
+
+        return cls(**values)
 
 
 class Config:
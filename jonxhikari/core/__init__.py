@@ -1,15 +1,53 @@
 from .utils import Errors
+from .utils import PoolBusyError
 from .utils import Embeds
 from .utils import Lines
+from .utils import LRUCache
+from .utils import ComponentRouter
+from .utils import PistonError
+from .utils import PistonBusyError
+from .utils import PistonQueue
+from .utils import ResultCache
+from .utils import RuntimeCatalogue
 from .db import AsyncPGDatabase
+from .db import UsageBuffer
+from .db import InvalidationBus
+from .db import GuildCache
+from .db import GuildSettings
+from .db import MigrationRunner
+from .db import TagIndex
+from .db import TagPager
+from .db import TagSearch
+from .starboard import Starboard
 from .client import SlashClient
 from .bot import Bot
+from .cluster import Cluster
+from .cluster import ClusterStats
 
 __all__ = [
     "Errors",
+    "PoolBusyError",
     "Embeds",
     "Lines",
+    "LRUCache",
+    "ComponentRouter",
+    "PistonError",
+    "PistonBusyError",
+    "PistonQueue",
+    "ResultCache",
+    "RuntimeCatalogue",
     "Bot",
+    "Cluster",
+    "ClusterStats",
+    "Starboard",
     "SlashClient",
     "AsyncPGDatabase",
+    "UsageBuffer",
+    "InvalidationBus",
+    "GuildCache",
+    "GuildSettings",
+    "MigrationRunner",
+    "TagIndex",
+    "TagPager",
+    "TagSearch",
 ]
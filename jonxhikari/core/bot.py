@@ -1,3 +1,4 @@
+import asyncio
 import typing as t
 from pathlib import Path
 
@@ -8,45 +9,89 @@ import tanjun
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 from jonxhikari import Config
+from jonxhikari import Settings
 from jonxhikari.core import AsyncPGDatabase
+from jonxhikari.core import ComponentRouter
 from jonxhikari.core import Embeds
 from jonxhikari.core import Errors
+from jonxhikari.core import GuildCache
+from jonxhikari.core import InvalidationBus
+from jonxhikari.core import LRUCache
 from jonxhikari.core import SlashClient
+from jonxhikari.core import Starboard
+from jonxhikari.core import TagIndex
+from jonxhikari.core import UsageBuffer
+
+if t.TYPE_CHECKING:
+    from jonxhikari.core.cluster import ClusterStats
+
+
+# Custom emoji ids in the home guild, and the unicode to use if they're gone
+STATUS_EMOJIS = {
+    "yes": (853792470651502603, "\N{WHITE HEAVY CHECK MARK}"),
+    "no": (853792496118267954, "\N{CROSS MARK}"),
+}
 
 
 class Bot(lightbulb.Bot):
-    def __init__(self, version: str) -> None:
+    def __init__(
+        self,
+        version: str,
+        settings: t.Optional[Settings] = None,
+        cluster: t.Optional["ClusterStats"] = None,
+        worker: int = 0,
+    ) -> None:
         self._plugins_dir = "./jonxhikari/core/plugins"
         self._plugins = [p.stem for p in Path(".").glob(f"{self._plugins_dir}/*.py")]
 
         self.version = version
+        self.settings = settings or Settings.from_env()
         self.invokes = 0
-        self.guilds: dict[int, dict[str, str]] = {}
+        self.cluster = cluster
+        self.worker = worker
+        self.home_guild = self.settings.home_guild
+        self.status_emojis = {name: fallback for name, (_, fallback) in STATUS_EMOJIS.items()}
 
         self.scheduler = AsyncIOScheduler()
         self.log = Config.logging()
         self.errors = Errors()
         self.embeds = Embeds()
-        self.pool = AsyncPGDatabase()
+        self.pool = AsyncPGDatabase(self.settings)
+        self.guilds = GuildCache(self.pool)
+        self.tag_uses = UsageBuffer(self.pool)
+        self.tags: LRUCache[tuple[int, str], t.Optional[str]] = LRUCache(
+            self.settings.tag_cache_size, ttl=self.settings.tag_cache_ttl
+        )
+        self.tag_names = TagIndex(self.pool)
+        self.bus = InvalidationBus(self.pool)
+        self.components = ComponentRouter()
 
         # Initiate lightbulb Bot superclass
         super().__init__(
-            token=Config.env("TOKEN"),
-            owner_ids=[Config.env("OWNER_IDS", int)],
-            intents=hikari.Intents.ALL,
+            token=self.settings.token,
+            owner_ids=self.settings.owner_ids,
+            intents=self.settings.profile.intents,
+            cache_settings=self.settings.profile.cache,
             prefix=lightbulb.when_mentioned_or(self.resolve_prefix),
             insensitive_commands=True,
             ignore_bots=True,
         )
 
+        self.starboard = Starboard(
+            self.pool, self.guilds, self.rest, index_size=self.settings.star_index_size
+        )
+
         # Create a Slash Command Client from the Bot
         self.client: SlashClient = (
             SlashClient.from_gateway_bot(
                 self,
-                set_global_commands=Config.env("HOME_GUILD", int),
+                # Only one worker in a cluster needs to declare the commands
+                set_global_commands=self.home_guild if not worker else False,
                 mention_prefix=True,
             )
             .set_type_dependency(self.__class__, self)
+            .set_type_dependency(Settings, self.settings)
+            .set_hooks(tanjun.AnyHooks().set_on_error(self.errors.tanjun_hook))
             .load_modules()
         )
 
@@ -60,52 +105,106 @@ class Bot(lightbulb.Bot):
             hikari.StartedEvent: self.on_started,
             hikari.StoppingEvent: self.on_stopping,
             hikari.GuildAvailableEvent: self.on_guild_available,
+            hikari.GuildJoinEvent: self.on_guild_join,
+            hikari.GuildLeaveEvent: self.on_guild_leave,
+            hikari.EmojisUpdateEvent: self.on_emojis_update,
+            hikari.InteractionCreateEvent: self.components.on_interaction,
+            hikari.GuildReactionAddEvent: self.starboard.on_reaction_add,
+            hikari.GuildReactionDeleteEvent: self.starboard.on_reaction_delete,
+            hikari.GuildReactionDeleteEmojiEvent: self.starboard.on_reaction_clear,
+            hikari.GuildReactionDeleteAllEvent: self.starboard.on_reaction_clear,
         }
 
         # Subscribe to events
         for key in subscriptions:
             self.subscribe(key, subscriptions[key])
 
-    @property
-    def yes(self) -> hikari.KnownCustomEmoji:
-        YES = 853792470651502603
-
-        cached_yes = self.cache.get_emoji(YES)
-        if isinstance(cached_yes, hikari.KnownCustomEmoji):
-            return cached_yes
-
-        fetched_yes = self.rest.fetch_emoji(Config.env("HOME_GUILD", int), YES)
-        if isinstance(fetched_yes, hikari.KnownCustomEmoji):
-            return fetched_yes
+        # Keep caches in sync with writes from other processes
+        invalidations = {
+            "prefix": self.on_prefix_invalidation,
+            "starboard": self.on_starboard_invalidation,
+            "tag": self.on_tag_invalidation,
+            "reset": self.on_bus_reset,
+        }
 
-        # We should never get here, but if so
-        raise self.errors.wtf("YES emoji is gone! PANIC!")
+        for kind in invalidations:
+            self.bus.subscribe(kind, invalidations[kind])
 
     @property
-    def no(self) -> hikari.KnownCustomEmoji:
-        NO = 853792496118267954
+    def yes(self) -> str:
+        return self.status_emojis["yes"]
 
-        cached_no = self.cache.get_emoji(NO)
-        if isinstance(cached_no, hikari.KnownCustomEmoji):
-            return cached_no
+    @property
+    def no(self) -> str:
+        return self.status_emojis["no"]
 
-        fetched_no = self.rest.fetch_emoji(Config.env("HOME_GUILD", int), NO)
-        if isinstance(fetched_no, hikari.KnownCustomEmoji):
-            return fetched_no
+    async def resolve_status_emojis(self) -> None:
+        """Fetches the status emojis concurrently, falling back to unicode."""
+        fetched = await asyncio.gather(
+            *(self.rest.fetch_emoji(self.home_guild, id_) for id_, _ in STATUS_EMOJIS.values()),
+            return_exceptions=True,
+        )
 
-        # We should never get here, but if so
-        raise self.errors.wtf("NO emoji is gone! PANIC!")
+        for (name, (_, fallback)), emoji in zip(STATUS_EMOJIS.items(), fetched):
+            self.status_emojis[name] = (
+                emoji.mention if isinstance(emoji, hikari.KnownCustomEmoji) else fallback
+            )
 
     async def on_guild_available(self, event: hikari.GuildAvailableEvent) -> None:
-        """fires on new guild join, on startup, and after disconnect"""
+        """fires on startup, and after disconnect"""
         if event.guild_id not in self.guilds:
-            await self.pool.execute(
-                "INSERT INTO guilds (GuildID) VALUES ($1) ON CONFLICT DO NOTHING;", event.guild_id
-            )
+            # Registered in batches, startup and reconnects fire these in bursts
+            self.guilds.queue(event.guild_id)
+
+    async def on_guild_join(self, event: hikari.GuildJoinEvent) -> None:
+        """fires when the bot is added to a new guild"""
+        self.guilds.queue(event.guild_id)
+
+    async def on_guild_leave(self, event: hikari.GuildLeaveEvent) -> None:
+        """fires when the bot is removed from a guild"""
+        self.guilds.evict(event.guild_id)
+        self.tag_names.evict(event.guild_id)
+
+    def on_prefix_invalidation(self, data: dict[str, t.Any]) -> None:
+        """Another process changed a guilds prefix"""
+        self.guilds.set_prefix(data["guild"], data["prefix"])
+
+    def on_starboard_invalidation(self, data: dict[str, t.Any]) -> None:
+        """Another process changed a guilds starboard channel"""
+        self.guilds.set_star_channel(data["guild"], data["channel"])
+
+    def on_bus_reset(self, _: dict[str, t.Any]) -> None:
+        """The bus reconnected, so any invalidation could have been missed"""
+        # Guilds are read again rather than dropped, the starboard needs them cached
+        self.guilds.reload()
+        self.tags.clear()
+        self.tag_names.clear()
+
+    def on_tag_invalidation(self, data: dict[str, t.Any]) -> None:
+        """Another process created, edited or deleted a tag"""
+        self.tags.pop((data["guild"], data["name"]))
+
+        if data["exists"]:
+            self.tag_names.add(data["guild"], data["name"])
+
+        else:
+            self.tag_names.remove(data["guild"], data["name"])
+
+    async def on_emojis_update(self, event: hikari.EmojisUpdateEvent) -> None:
+        """fires when a guilds emojis are added, changed or removed"""
+        if event.guild_id != self.home_guild:
+            return None
+
+        emojis = {int(e.id): e for e in event.emojis}
+
+        for name, (id_, fallback) in STATUS_EMOJIS.items():
+            self.status_emojis[name] = emojis[id_].mention if id_ in emojis else fallback
 
     async def on_starting(self, _: hikari.StartingEvent) -> None:
         """Fires before bot is connected. Blocks on_started until complete."""
         await self.pool.connect()
+        await self.bus.connect()
+        await self.resolve_status_emojis()
         self.session = aiohttp.ClientSession()
 
         # Load plugins from Lightbulb
@@ -114,14 +213,11 @@ class Bot(lightbulb.Bot):
 
     async def on_started(self, _: hikari.StartedEvent) -> None:
         """Fires once bot is fully connected"""
+        # Prefixes are cached as guilds become available, no need to read them here
+        self.scheduler.add_job(self.tag_uses.flush, "interval", seconds=60)
 
-        # List of tuples containing guild ID and prefix or None
-        guild_prefix = await self.pool.rows("SELECT GuildID, Prefix FROM guilds;")
-
-        if guild_prefix is not None:
-            for guild, prefix in guild_prefix:
-                # Cache prefixes into self.guilds
-                self.guilds[guild] = {"prefix": prefix}
+        if self.cluster is not None:
+            self.scheduler.add_job(self.publish_stats, "interval", seconds=10)
 
         self.scheduler.start()
         self.add_check(self.no_dm_commands)
@@ -131,25 +227,31 @@ class Bot(lightbulb.Bot):
 
     async def on_stopping(self, _: hikari.StoppingEvent) -> None:
         """Fires at the beginning of shutdown sequence"""
+        # Stop scheduled jobs first, so nothing runs against a closed pool
+        self.scheduler.shutdown()
+        await self.guilds.flush()
+        await self.tag_uses.flush()
+        await self.starboard.flush()
+        await self.bus.close()
         await self.pool.close()
         await self.session.close()
         # await self.music.close()
-        self.scheduler.shutdown()
+
+    def publish_stats(self) -> None:
+        """Shares this workers counters with the rest of the cluster."""
+        assert self.cluster is not None
+        self.cluster.publish(self.worker, self.invokes, self.pool.calls, len(self.guilds))
 
     async def resolve_prefix(self, _: lightbulb.Bot, message: hikari.Message) -> str:
         """Grabs a prefix to be used in a particular context"""
-        if (id_ := message.guild_id) and id_ in self.guilds:
-            cached_p: str = self.guilds[id_]["prefix"]
-            return cached_p
+        if (id_ := message.guild_id) is None:
+            return GuildCache.DEFAULT_PREFIX
 
-        elif not await self.no_dm_commands(message):
-            fetched_p: str = await self.pool.fetch(
-                "SELECT Prefix FROM guilds WHERE GuildID = $1;", id_
-            )
-            return fetched_p
+        # Cache hits return without awaiting anything
+        if (cached_p := self.guilds.get_prefix(id_)) is not None:
+            return cached_p
 
-        else:
-            return "$"
+        return await self.guilds.fetch_prefix(id_)
 
     # TODO Find a better way. guild_id may not be cached.
     async def no_dm_commands(self, message: hikari.Message) -> bool:
@@ -0,0 +1,195 @@
+import asyncio
+import multiprocessing
+import multiprocessing.context
+import multiprocessing.process
+import multiprocessing.synchronize
+import time
+import typing as t
+
+import hikari
+import uvloop
+
+from jonxhikari import Config
+from .bot import Bot
+
+
+class ClusterStats:
+    """Counters shared between every worker process in a cluster."""
+
+    FIELDS = ("invokes", "db_calls", "guilds")
+
+    def __init__(self, workers: int, ctx: multiprocessing.context.BaseContext) -> None:
+        self.workers = workers
+        self._values = ctx.Array("q", workers * len(self.FIELDS))
+
+    def publish(self, worker: int, invokes: int, db_calls: int, guilds: int) -> None:
+        """Stores the latest counters for a worker."""
+        start = worker * len(self.FIELDS)
+
+        with self._values.get_lock():
+            self._values[start : start + len(self.FIELDS)] = [invokes, db_calls, guilds]
+
+    def totals(self) -> dict[str, int]:
+        """Sums the counters of every worker."""
+        with self._values.get_lock():
+            values = self._values[:]
+
+        step = len(self.FIELDS)
+        return {field: sum(values[i::step]) for i, field in enumerate(self.FIELDS)}
+
+
+def run_worker(
+    version: str,
+    worker: int,
+    shard_ids: set[int],
+    shard_count: int,
+    stats: ClusterStats,
+    started: multiprocessing.synchronize.Event,
+) -> None:
+    """Runs a Bot for a slice of the shards. The default cluster target."""
+    uvloop.install()
+    bot = Bot(version, cluster=stats, worker=worker)
+
+    async def on_started(_: hikari.StartedEvent) -> None:
+        # Every shard has identified, the next worker can start
+        started.set()
+
+    bot.subscribe(hikari.StartedEvent, on_started)
+    bot.run(shard_ids=shard_ids, shard_count=shard_count)
+
+
+class Cluster:
+    """Splits the bots shards across worker processes and supervises them.
+
+    Each worker runs its own Bot and SlashClient, with the shard ids
+    `worker, worker + workers, ...`. Workers that crash are restarted,
+    a worker that exits cleanly (i.e. the shutdown command) is not.
+
+    Discord lets `max_concurrency` shards identify every 5 seconds, and
+    workers can't see each others shards, so workers are started one at
+    a time. The next worker starts once the last one has identified all
+    of its shards, and the 5 seconds after its last identify have passed.
+    """
+
+    # Seconds between identify windows
+    IDENTIFY_WINDOW = 5.0
+
+    def __init__(
+        self,
+        version: str,
+        workers: int,
+        shard_count: int,
+        *,
+        target: t.Callable[..., None] = run_worker,
+        restart_delay: float = 5.0,
+        max_concurrency: int = 1,
+        start_timeout: float = 60.0,
+    ) -> None:
+        if not 0 < workers <= shard_count:
+            raise ValueError("Need at least 1 worker, and no more workers than shards.")
+
+        self.version = version
+        self.workers = workers
+        self.shard_count = shard_count
+        self.target = target
+        self.restart_delay = restart_delay
+        self.max_concurrency = max_concurrency
+        self.start_timeout = start_timeout
+        self.restarts = 0
+        self.log = Config.logging()
+
+        self._ctx = multiprocessing.get_context("spawn")
+        self.stats = ClusterStats(workers, self._ctx)
+        self._started = self._ctx.Event()
+        self._procs: dict[int, multiprocessing.process.BaseProcess] = {}
+
+    @staticmethod
+    def fetch_max_concurrency(token: str) -> int:
+        """Gets how many shards may identify at once, from the gateway."""
+
+        async def fetch() -> int:
+            async with hikari.RESTApp().acquire(token, "Bot") as rest:
+                info = await rest.fetch_gateway_bot_info()
+                return info.session_start_limit.max_concurrency
+
+        return asyncio.run(fetch())
+
+    def shards_for(self, worker: int) -> set[int]:
+        """The shard ids a worker is responsible for."""
+        return set(range(worker, self.shard_count, self.workers))
+
+    def identify_time(self, worker: int) -> float:
+        """How long a worker needs to identify all of its shards."""
+        windows = {shard_id // self.max_concurrency for shard_id in self.shards_for(worker)}
+        return len(windows) * self.IDENTIFY_WINDOW
+
+    def start_worker(self, worker: int) -> None:
+        """Starts, or restarts, a worker process.
+
+        Blocks until the workers shards have identified, or it gives up
+        after `start_timeout` seconds on top of its `identify_time`.
+        """
+        self._started.clear()
+        proc = self._ctx.Process(
+            target=self.target,
+            args=(
+                self.version,
+                worker,
+                self.shards_for(worker),
+                self.shard_count,
+                self.stats,
+                self._started,
+            ),
+            name=f"jonxhikari-worker-{worker}",
+        )
+
+        proc.start()
+        self._procs[worker] = proc
+        deadline = time.monotonic() + self.identify_time(worker) + self.start_timeout
+
+        while not self._started.wait(1.0):
+            if not proc.is_alive() or time.monotonic() > deadline:
+                self.log.warning(f"Worker {worker} didn't finish starting its shards.")
+                break
+
+        # Let the last identify window pass before anyone else identifies
+        time.sleep(self.IDENTIFY_WINDOW)
+
+    def supervise(self, interval: float = 1.0) -> None:
+        """Restarts crashed workers until every worker has exited cleanly."""
+        while self._procs:
+            time.sleep(interval)
+
+            for worker, proc in list(self._procs.items()):
+                if proc.is_alive():
+                    continue
+
+                if proc.exitcode == 0:
+                    del self._procs[worker]
+                    continue
+
+                self.log.warning(f"Worker {worker} exited with {proc.exitcode}, restarting...")
+                self.restarts += 1
+                time.sleep(self.restart_delay)
+                self.start_worker(worker)
+
+    def stop(self) -> None:
+        """Terminates every worker process."""
+        for proc in self._procs.values():
+            proc.terminate()
+
+        for proc in self._procs.values():
+            proc.join()
+
+        self._procs.clear()
+
+    def run(self) -> None:
+        """Starts every worker, and supervises them until they exit."""
+        for worker in range(self.workers):
+            self.start_worker(worker)
+
+        try:
+            self.supervise()
+
+        except KeyboardInterrupt:
+            self.stop()
@@ -1,3 +1,21 @@
 from .db import AsyncPGDatabase
+from .buffers import UsageBuffer
+from .bus import InvalidationBus
+from .guilds import GuildCache
+from .guilds import GuildSettings
+from .migrations import MigrationRunner
+from .tags import TagIndex
+from .tags import TagPager
+from .tags import TagSearch
 
-__all__ = ["AsyncPGDatabase"]
+__all__ = [
+    "AsyncPGDatabase",
+    "UsageBuffer",
+    "InvalidationBus",
+    "GuildCache",
+    "GuildSettings",
+    "MigrationRunner",
+    "TagIndex",
+    "TagPager",
+    "TagSearch",
+]
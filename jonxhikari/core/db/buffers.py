@@ -0,0 +1,56 @@
+import collections
+import typing as t
+
+if t.TYPE_CHECKING:
+    from .db import AsyncPGDatabase
+
+
+class UsageBuffer:
+    """Accumulates tag uses in memory and writes them in one batch.
+
+    Bumping `Uses` on every read turns `/tag get` into a row locking
+    write, so uses are counted here and flushed by the scheduler.
+    """
+
+    FLUSH_QUERY = (
+        "UPDATE tags SET Uses = tags.Uses + u.Uses "
+        "FROM unnest($1::bigint[], $2::text[], $3::bigint[]) AS u(GuildID, TagName, Uses) "
+        "WHERE tags.GuildID = u.GuildID AND tags.TagName = u.TagName;"
+    )
+
+    def __init__(self, pool: "AsyncPGDatabase") -> None:
+        self.pool = pool
+        self._pending: collections.Counter[tuple[int, str]] = collections.Counter()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, guild_id: int, name: str, uses: int = 1) -> None:
+        """Counts uses of a tag, to be written on the next flush."""
+        self._pending[(guild_id, name)] += uses
+
+    def pending(self, guild_id: int, name: str) -> int:
+        """Gets the uses of a tag that have not been flushed yet."""
+        return self._pending.get((guild_id, name), 0)
+
+    def discard(self, guild_id: int, name: str) -> None:
+        """Drops the unflushed uses of a tag, i.e. when it is deleted."""
+        self._pending.pop((guild_id, name), None)
+
+    async def flush(self) -> None:
+        """Writes all pending uses to the database."""
+        if not self._pending:
+            return None
+
+        pending, self._pending = self._pending, collections.Counter()
+        guild_ids, names = zip(*pending.keys())
+
+        try:
+            await self.pool.execute(
+                self.FLUSH_QUERY, list(guild_ids), list(names), list(pending.values())
+            )
+
+        except Exception:
+            # Keep the uses around for the next flush
+            self._pending.update(pending)
+            raise
@@ -0,0 +1,98 @@
+import asyncio
+import json
+import typing as t
+import uuid
+
+import asyncpg
+
+if t.TYPE_CHECKING:
+    from .db import AsyncPGDatabase
+
+
+HandlerT = t.Callable[[dict[str, t.Any]], None]
+
+
+class InvalidationBus:
+    """Shares cache invalidations between processes with LISTEN/NOTIFY.
+
+    Writers send a `notification` with the write that changes something
+    another process may have cached, so it's only heard if the write
+    commits. Every process listens on its own connection, outside the pool,
+    and passes what it hears to the handlers subscribed to that kind.
+    Handlers for "reset" run after the listener reconnects, since
+    anything published while it was down was missed.
+    """
+
+    CHANNEL = "jonxhikari_invalidate"
+
+    def __init__(self, pool: "AsyncPGDatabase", reconnect_delay: float = 5.0) -> None:
+        self.pool = pool
+        self.reconnect_delay = reconnect_delay
+        self.origin = uuid.uuid4().hex
+        self._handlers: dict[str, list[HandlerT]] = {}
+        self._conn: t.Optional[asyncpg.Connection] = None
+        self._closing = False
+        self._reconnects: set[asyncio.Task[None]] = set()
+
+    def subscribe(self, kind: str, handler: HandlerT) -> None:
+        """Calls the handler with the payload of each invalidation of this kind."""
+        self._handlers.setdefault(kind, []).append(handler)
+
+    async def connect(self) -> None:
+        """Opens the dedicated listener connection."""
+        self._closing = False
+        self._conn = await asyncpg.connect(
+            user=self.pool.user,
+            host=self.pool.host,
+            port=self.pool.port,
+            database=self.pool.db,
+            password=self.pool.password,
+        )
+
+        await self._conn.add_listener(self.CHANNEL, self._on_notify)
+        self._conn.add_termination_listener(self._on_terminate)
+
+    async def close(self) -> None:
+        """Closes the listener connection."""
+        self._closing = True
+
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+    def notification(self, kind: str, **data: t.Any) -> tuple[str, str]:
+        """The channel and payload telling every other process about a change.
+
+        Pass it as the `notify` of `AsyncPGDatabase.mutate` or `conditional`.
+        """
+        return self.CHANNEL, json.dumps({"kind": kind, "origin": self.origin, **data})
+
+    def _dispatch(self, kind: str, data: dict[str, t.Any]) -> None:
+        for handler in self._handlers.get(kind, ()):
+            handler(data)
+
+    def _on_notify(self, _: asyncpg.Connection, __: int, ___: str, payload: str) -> None:
+        data = json.loads(payload)
+
+        # We already updated our own caches when we wrote it
+        if data.pop("origin", None) != self.origin:
+            self._dispatch(data.pop("kind"), data)
+
+    def _on_terminate(self, _: asyncpg.Connection) -> None:
+        if not self._closing:
+            task = asyncio.create_task(self._reconnect())
+            self._reconnects.add(task)
+            task.add_done_callback(self._reconnects.discard)
+
+    async def _reconnect(self) -> None:
+        while not self._closing:
+            await asyncio.sleep(self.reconnect_delay)
+
+            try:
+                await self.connect()
+
+            except (OSError, asyncio.TimeoutError, asyncpg.PostgresError, asyncpg.InterfaceError):
+                continue
+
+            self._dispatch("reset", {})
+            return None
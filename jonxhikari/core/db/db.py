@@ -1,24 +1,46 @@
 import asyncio
+import contextlib
 import functools
+import time
 import typing as t
 
 import asyncpg
-import aiofiles
 
-from jonxhikari import Config
+from jonxhikari import Settings
+from jonxhikari.core.utils import PoolBusyError
+from .metrics import QueryMetrics
+from .migrations import MigrationRunner
+from .statements import StatementRegistry
 
 
 class AsyncPGDatabase:
     """Wrapper class for AsyncPG Database access."""
 
-    def __init__(self) -> None:
+    # Helpers that run a single statement with plain values, so can be explained
+    EXPLAINABLE = ("fetch", "row", "rows", "column", "execute")
+
+    def __init__(self, settings: Settings) -> None:
         self.calls = 0
-        self.db = Config.env("PG_DB")
-        self.host = Config.env("PG_HOST")
-        self.user = Config.env("PG_USER")
-        self.password = Config.env("PG_PASS")
-        self.port = Config.env("PG_PORT", int)
-        self.schema = "./jonxhikari/data/static/schema.sql"
+        self.db = settings.pg_db
+        self.host = settings.pg_host
+        self.user = settings.pg_user
+        self.password = settings.pg_pass
+        self.port = settings.pg_port
+        self.min_size = settings.pool_min_size
+        self.max_size = settings.pool_max_size
+        self.acquire_timeout = settings.pool_acquire_timeout
+        self.max_waiting = settings.pool_max_waiting
+        self.command_timeout = settings.command_timeout
+        self.in_use = 0
+        self.waiting = 0
+        self.wait_time = 0.0
+        self.rejected = 0
+        self.timeouts = 0
+        self.migrations = MigrationRunner(self)
+        self.statements = StatementRegistry(settings.statement_cache_size)
+        self.metrics = QueryMetrics(settings.slow_query_ms)
+        self.explain_slow = settings.explain_slow_queries
+        self._explains: set[asyncio.Task[None]] = set()
 
     async def connect(self) -> None:
         """Opens a connection pool."""
@@ -29,36 +51,167 @@ class AsyncPGDatabase:
             database=self.db,
             password=self.password,
             loop=asyncio.get_running_loop(),
+            min_size=self.min_size,
+            max_size=self.max_size,
+            command_timeout=self.command_timeout,
+            init=self.statements.register,
+            # Mirror asyncpg's statement cache with our registry
+            statement_cache_size=self.statements.max_size,
+            max_cached_statement_lifetime=0,
         )
 
-        await self.scriptexec(self.schema)
+        await self.migrations.run()
 
     async def close(self) -> None:
         """Closes the connection pool."""
+        # Explains still running would hit the closing pool
+        for task in self._explains:
+            task.cancel()
+
+        await asyncio.gather(*self._explains, return_exceptions=True)
         await self.pool.close()
+        self.statements.clear()
+
+    @property
+    def avg_wait(self) -> float:
+        """The average time in seconds spent waiting to acquire a connection.
+
+        Callers rejected straight away never waited, so aren't counted.
+        """
+        attempts = self.calls + self.timeouts
+        return self.wait_time / attempts if attempts else 0.0
+
+    @contextlib.asynccontextmanager
+    async def acquire(self) -> t.AsyncIterator[asyncpg.Connection]:
+        """Acquires a connection from the pool.
+
+        Raises `PoolBusyError` straight away if too many callers are already
+        waiting, or once `acquire_timeout` passes without a free connection.
+        """
+        if self.waiting >= self.max_waiting:
+            self.rejected += 1
+            raise PoolBusyError("Too many callers are waiting for a connection.")
+
+        start = time.perf_counter()
+        self.waiting += 1
+
+        try:
+            conn = await self.pool.acquire(timeout=self.acquire_timeout)
+
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            self.timeouts += 1
+            raise PoolBusyError("Timed out waiting for a connection.") from None
+
+        finally:
+            self.waiting -= 1
+            self.wait_time += time.perf_counter() - start
+
+        self.calls += 1
+        self.in_use += 1
+
+        try:
+            yield conn
+
+        finally:
+            self.in_use -= 1
+            await self.pool.release(conn)
+
+    @contextlib.asynccontextmanager
+    async def transaction(self) -> t.AsyncIterator[asyncpg.Connection]:
+        """Acquires a connection with an open transaction.
+
+        The transaction commits when the block exits, or rolls back if it
+        raises.
+        """
+        async with self.acquire() as conn:
+            async with conn.transaction():
+                yield conn
 
     def with_connection(func: t.Callable[..., t.Any]) -> t.Callable[..., t.Any]: # type: ignore
         """A decorator used to acquire a connection from the pool."""
 
         @functools.wraps(func)
         async def wrapper(self: "AsyncPGDatabase", *args: t.Any) -> t.Any:
-            async with self.pool.acquire() as conn:
-                self.calls += 1
-                return await func(self, *args, conn=conn)
+            start = time.perf_counter()
+
+            async with self.acquire() as conn:
+                acquired = time.perf_counter()
+                result = await func(self, *args, conn=conn)
+                executed = time.perf_counter()
+
+            slow = self.metrics.record(
+                args[0],
+                (acquired - start) * 1000,
+                (executed - acquired) * 1000,
+                self._count_rows(func.__name__, result, args),
+            )
+
+            if slow and self.explain_slow and func.__name__ in self.EXPLAINABLE:
+                task = asyncio.create_task(self._explain(args[0], *args[1:]))
+                self._explains.add(task)
+                task.add_done_callback(self._explains.discard)
+
+            return result
 
         return wrapper
 
+    @staticmethod
+    def _count_rows(name: str, result: t.Any, args: tuple[t.Any, ...]) -> int:
+        if name in ("fetch", "row"):
+            return int(result is not None)
+
+        if name in ("rows", "column"):
+            return len(result or ())
+
+        if name == "executemany":
+            return len(args[1])
+
+        if name == "execute" and (count := result.rsplit(" ", 1)[-1]).isdigit():
+            # i.e. "UPDATE 3"
+            return int(count)
+
+        return 0
+
+    async def _explain(self, q: str, *values: t.Any) -> None:
+        """Captures the plan of a slow statement, once per statement."""
+        if (stats := self.metrics.get(q)) is None or stats.plan is not None:
+            return None
+
+        try:
+            async with self.acquire() as conn:
+                # ANALYZE really runs the statement, so never let writes commit
+                tr = conn.transaction()
+                await tr.start()
+
+                try:
+                    self.statements.track(conn, f"EXPLAIN (ANALYZE, BUFFERS) {q}")
+                    plan = await conn.fetch(f"EXPLAIN (ANALYZE, BUFFERS) {q}", *values)
+
+                finally:
+                    await tr.rollback()
+
+        except (
+            asyncpg.PostgresError,
+            asyncpg.InterfaceError,
+            asyncio.TimeoutError,
+            PoolBusyError,
+        ):
+            return None
+
+        self.metrics.set_plan(q, "\n".join(r[0] for r in plan))
+
     @with_connection
     async def fetch(self, q: str, *values: t.Any, conn: asyncpg.Connection) -> t.Optional[t.Any]:
         """Read 1 field of applicable data."""
-        query = await conn.prepare(q)
-        return await query.fetchval(*values)
+        self.statements.track(conn, q)
+        return await conn.fetchval(q, *values)
 
     @with_connection
     async def row(self, q: str, *values: t.Any, conn: asyncpg.Connection) -> t.Optional[t.List[t.Any]]:
         """Read 1 row of applicable data."""
-        query = await conn.prepare(q)
-        if data := await query.fetchrow(*values):
+        self.statements.track(conn, q)
+        if data := await conn.fetchrow(q, *values):
             return [r for r in data]
 
         return None
@@ -66,8 +219,8 @@ class AsyncPGDatabase:
     @with_connection
     async def rows(self, q: str, *values: t.Any, conn: asyncpg.Connection) -> t.Optional[t.List[t.Iterable[t.Any]]]:
         """Read all rows of applicable data."""
-        query = await conn.prepare(q)
-        if data := await query.fetch(*values):
+        self.statements.track(conn, q)
+        if data := await conn.fetch(q, *values):
             return [*map(lambda r: tuple(r.values()), data)]
 
         return None
@@ -75,23 +228,75 @@ class AsyncPGDatabase:
     @with_connection
     async def column(self, q: str, *values: t.Any, conn: asyncpg.Connection) -> t.List[t.Any]:
         """Read a single column of applicable data."""
-        query = await conn.prepare(q)
-        return [r[0] for r in await query.fetch(*values)]
+        self.statements.track(conn, q)
+        return [r[0] for r in await conn.fetch(q, *values)]
 
     @with_connection
-    async def execute(self, q: str, *values: t.Any, conn: asyncpg.Connection) -> None:
-        """Execute a write operation on the database."""
-        query = await conn.prepare(q)
-        await query.fetch(*values)
+    async def execute(self, q: str, *values: t.Any, conn: asyncpg.Connection) -> str:
+        """Execute a write operation on the database. Returns the status, i.e. `UPDATE 1`."""
+        self.statements.track(conn, q)
+        status: str = await conn.execute(q, *values)
+        return status
 
     @with_connection
     async def executemany(self, q: str, values: t.List[t.Iterable[t.Any]], conn: asyncpg.Connection) -> None:
         """Execute a write operation for each set of values."""
-        query = await conn.prepare(q)
-        await query.executemany(values)
+        self.statements.track(conn, q)
+        await conn.executemany(q, values)
 
-    @with_connection
-    async def scriptexec(self, path: str, conn: asyncpg.Connection) -> None:
-        """Execute an sql script at a given path."""
-        async with aiofiles.open(path, "r", encoding="utf-8") as script:
-            await conn.execute((await script.read()))
+    async def conditional(
+        self,
+        check: str,
+        mutation: str,
+        *values: t.Any,
+        notify: t.Optional[tuple[str, str]] = None,
+    ) -> tuple[t.Optional[t.Any], bool]:
+        """Runs a check and a conditional write in a single round trip.
+
+        Both statements share the given values. Returns the field read by
+        the check, and whether the mutation affected any rows. The mutation
+        should carry its own condition (i.e. `WHERE TagOwner = $n`), so it
+        can't race with whatever the check read.
+
+        `notify` is a channel and payload, sent with `pg_notify` in the
+        same statement if the mutation affected any rows.
+        """
+        data = await self.row(
+            f"WITH target AS ({check}), mutated AS ({mutation} RETURNING 1) "
+            "SELECT (SELECT * FROM target), EXISTS (SELECT 1 FROM mutated)"
+            f"{self._notify_column(len(values), notify)};",
+            *values,
+            *(notify or ()),
+        )
+
+        assert data is not None
+        return data[0], data[1]
+
+    async def mutate(
+        self, mutation: str, *values: t.Any, notify: t.Optional[tuple[str, str]] = None
+    ) -> bool:
+        """Runs a write. Returns whether it affected any rows.
+
+        `notify` is a channel and payload, sent with `pg_notify` in the
+        same statement if the write affected any rows.
+        """
+        data = await self.row(
+            f"WITH mutated AS ({mutation} RETURNING 1) SELECT EXISTS (SELECT 1 FROM mutated)"
+            f"{self._notify_column(len(values), notify)};",
+            *values,
+            *(notify or ()),
+        )
+
+        assert data is not None
+        return bool(data[0])
+
+    @staticmethod
+    def _notify_column(count: int, notify: t.Optional[tuple[str, str]]) -> str:
+        if notify is None:
+            return ""
+
+        # A scalar subquery, so it only notifies once, and only if something changed
+        return (
+            f", (SELECT pg_notify(${count + 1}, ${count + 2}) "
+            "WHERE EXISTS (SELECT 1 FROM mutated))"
+        )
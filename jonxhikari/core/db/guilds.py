@@ -0,0 +1,192 @@
+import asyncio
+import contextlib
+import logging
+import sys
+import typing as t
+
+if t.TYPE_CHECKING:
+    from .db import AsyncPGDatabase
+
+
+class GuildSettings:
+    """The settings stored for a single guild."""
+
+    __slots__ = ("prefix", "star_channel")
+
+    def __init__(self, prefix: str, star_channel: int = 0) -> None:
+        # Nearly every guild uses the default, so they can all share one string
+        self.prefix = sys.intern(prefix)
+        self.star_channel = star_channel
+
+
+class GuildCache:
+    """Caches guild settings, filling from the database on a miss.
+
+    Each guild is a single slotted `GuildSettings` record rather than a
+    dict, and guilds on the default prefix share one interned string.
+    `scripts/guild_memory.py` measures what that saves per guild.
+    """
+
+    DEFAULT_PREFIX = "$"
+
+    REGISTER_QUERY = (
+        "WITH new AS ("
+        "INSERT INTO guilds (GuildID) SELECT unnest($1::bigint[]) "
+        "ON CONFLICT DO NOTHING RETURNING GuildID, Prefix, StarChannel"
+        ") SELECT GuildID, Prefix, StarChannel FROM new "
+        "UNION ALL SELECT GuildID, Prefix, StarChannel FROM guilds "
+        "WHERE GuildID = ANY($1::bigint[]);"
+    )
+
+    def __init__(
+        self,
+        pool: "AsyncPGDatabase",
+        batch_window: float = 1.0,
+        batch_size: int = 1000,
+        max_backoff: float = 60.0,
+    ) -> None:
+        self.pool = pool
+        self.batch_window = batch_window
+        self.batch_size = batch_size
+        self.max_backoff = max_backoff
+        self.log = logging.getLogger("root")
+        self._guilds: dict[int, GuildSettings] = {}
+        self._pending: dict[int, asyncio.Task[GuildSettings]] = {}
+        self._queued: set[int] = set()
+        self._batch: t.Optional[asyncio.Task[None]] = None
+        self._batch_full: t.Optional[asyncio.Event] = None
+        self._backoff = batch_window
+
+    def __len__(self) -> int:
+        return len(self._guilds)
+
+    def __contains__(self, guild_id: object) -> bool:
+        return guild_id in self._guilds
+
+    def get(self, guild_id: int) -> t.Optional[GuildSettings]:
+        """Gets a guilds cached settings, without touching the database."""
+        return self._guilds.get(guild_id)
+
+    def get_prefix(self, guild_id: int) -> t.Optional[str]:
+        """Gets a cached prefix, without touching the database."""
+        if (guild := self._guilds.get(guild_id)) is not None:
+            return guild.prefix
+
+        return None
+
+    def set(self, guild_id: int, prefix: t.Optional[str], star_channel: t.Optional[int]) -> None:
+        """Caches a guilds settings. `None` caches the defaults."""
+        self._guilds[guild_id] = GuildSettings(prefix or self.DEFAULT_PREFIX, star_channel or 0)
+
+    def set_prefix(self, guild_id: int, prefix: str) -> None:
+        """Updates a cached guilds prefix."""
+        if (guild := self._guilds.get(guild_id)) is not None:
+            guild.prefix = sys.intern(prefix)
+
+    def set_star_channel(self, guild_id: int, channel_id: int) -> None:
+        """Updates a cached guilds starboard channel."""
+        if (guild := self._guilds.get(guild_id)) is not None:
+            guild.star_channel = channel_id
+
+    def reload(self) -> None:
+        """Queues every cached guild to be read again, keeping them cached until then."""
+        for guild_id in self._guilds:
+            self.queue(guild_id)
+
+    def evict(self, guild_id: int) -> None:
+        """Removes a guild from the cache."""
+        self._guilds.pop(guild_id, None)
+        self._queued.discard(guild_id)
+
+    async def fetch(self, guild_id: int) -> GuildSettings:
+        """Gets a guilds settings, from the database on a miss, and caches them.
+
+        Concurrent misses for the same guild share one query.
+        """
+        if (guild := self._guilds.get(guild_id)) is not None:
+            return guild
+
+        if guild_id in self._queued and self._batch is not None:
+            # It's about to be registered, which caches the settings anyway.
+            # If the batch fails it's still queued, so load it on its own
+            await asyncio.shield(self._batch)
+
+            if (guild := self._guilds.get(guild_id)) is not None:
+                return guild
+
+        if (task := self._pending.get(guild_id)) is None:
+            task = self._pending[guild_id] = asyncio.create_task(self._load(guild_id))
+            task.add_done_callback(lambda _: self._pending.pop(guild_id, None))
+
+        # Shielded so one cancelled waiter doesn't cancel the query for the rest
+        return await asyncio.shield(task)
+
+    async def fetch_prefix(self, guild_id: int) -> str:
+        """Gets a prefix, from the database on a miss, and caches it."""
+        return (await self.fetch(guild_id)).prefix
+
+    def queue(self, guild_id: int) -> None:
+        """Queues a guild to be registered with the next batch.
+
+        Batches are written `batch_window` seconds after the first guild
+        is queued, or as soon as `batch_size` guilds are waiting.
+        """
+        self._queued.add(guild_id)
+
+        if self._batch is None:
+            self._schedule(self.batch_window)
+
+        elif len(self._queued) >= self.batch_size:
+            assert self._batch_full is not None
+            self._batch_full.set()
+
+    async def flush(self) -> None:
+        """Registers every queued guild right away."""
+        await self.register(*self._queued)
+
+    async def register(self, *guild_ids: int) -> None:
+        """Adds new guilds to the database, and caches their prefixes."""
+        if not guild_ids:
+            return None
+
+        self._queued.difference_update(guild_ids)
+
+        try:
+            rows = await self.pool.rows(self.REGISTER_QUERY, list(guild_ids))
+
+        except Exception:
+            # Try them again with the next batch, even if no other guild is queued
+            self._queued.update(guild_ids)
+
+            if self._batch is None:
+                self._backoff = min(self._backoff * 2, self.max_backoff)
+                self._schedule(self._backoff)
+
+            raise
+
+        self._backoff = self.batch_window
+
+        for guild_id, prefix, star_channel in rows or ():
+            self.set(guild_id, prefix, star_channel)
+
+    def _schedule(self, delay: float) -> None:
+        self._batch_full = asyncio.Event()
+        self._batch = asyncio.create_task(self._flush_batch(self._batch_full, delay))
+
+    async def _flush_batch(self, full: asyncio.Event, delay: float) -> None:
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(full.wait(), delay)
+
+        self._batch = None
+
+        try:
+            await self.register(*self._queued)
+
+        except Exception as e:
+            # They were put back in the queue, and retry with a backoff
+            self.log.warning(f"Couldn't register {len(self._queued)} guilds: {e!r}")
+
+    async def _load(self, guild_id: int) -> GuildSettings:
+        # Registers it too, so a guild we never saw join still gets a row
+        await self.register(guild_id)
+        return self._guilds.get(guild_id) or GuildSettings(self.DEFAULT_PREFIX)
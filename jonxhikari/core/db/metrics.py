@@ -0,0 +1,113 @@
+import bisect
+import logging
+import typing as t
+
+
+def normalize(q: str) -> str:
+    """Collapses whitespace, so the same statement always has the same key."""
+    return " ".join(q.split())
+
+
+class Histogram:
+    """A fixed size, log scaled latency histogram, in milliseconds."""
+
+    # 0.05 ms up to ~34 s, each bucket 25% wider than the last
+    BOUNDS = [0.05 * 1.25 ** i for i in range(61)]
+
+    __slots__ = ("counts", "total")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.total = 0
+
+    def add(self, ms: float) -> None:
+        self.counts[bisect.bisect_left(self.BOUNDS, ms)] += 1
+        self.total += 1
+
+    def percentile(self, p: float) -> float:
+        """The upper bound of the bucket holding the pth percentile."""
+        if not self.total:
+            return 0.0
+
+        target = p / 100 * self.total
+        seen = 0
+
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return self.BOUNDS[min(i, len(self.BOUNDS) - 1)]
+
+        return self.BOUNDS[-1]
+
+
+class QueryStats:
+    """Latency and row counts for one statement."""
+
+    __slots__ = ("query", "calls", "rows", "acquire_ms", "execute_ms", "histogram", "plan")
+
+    def __init__(self, query: str) -> None:
+        self.query = query
+        self.calls = 0
+        self.rows = 0
+        self.acquire_ms = 0.0
+        self.execute_ms = 0.0
+        self.histogram = Histogram()
+        self.plan: t.Optional[str] = None
+
+    @property
+    def total_ms(self) -> float:
+        return self.acquire_ms + self.execute_ms
+
+    def percentiles(self) -> tuple[float, float, float]:
+        """Gets the (p50, p95, p99) execution latencies."""
+        h = self.histogram
+        return h.percentile(50), h.percentile(95), h.percentile(99)
+
+
+class QueryMetrics:
+    """Per statement latency histograms, and a slow query log."""
+
+    def __init__(self, slow_ms: float = 250.0, max_statements: int = 512) -> None:
+        self.slow_ms = slow_ms
+        self.max_statements = max_statements
+        self.log = logging.getLogger("root")
+        self._stats: dict[str, QueryStats] = {}
+
+    def __len__(self) -> int:
+        return len(self._stats)
+
+    def get(self, q: str) -> t.Optional[QueryStats]:
+        return self._stats.get(normalize(q))
+
+    def record(self, q: str, acquire_ms: float, execute_ms: float, rows: int) -> bool:
+        """Records a statement execution. Returns whether it was slow."""
+        key = normalize(q)
+
+        if (stats := self._stats.get(key)) is None:
+            if len(self._stats) >= self.max_statements:
+                # Statements are parameterized, this only happens with dynamic sql
+                return False
+
+            stats = self._stats[key] = QueryStats(key)
+
+        stats.calls += 1
+        stats.rows += rows
+        stats.acquire_ms += acquire_ms
+        stats.execute_ms += execute_ms
+        stats.histogram.add(execute_ms)
+
+        if execute_ms < self.slow_ms:
+            return False
+
+        self.log.warning(f"Slow query ({execute_ms:,.2f} ms, {rows} rows): {key}")
+        return True
+
+    def set_plan(self, q: str, plan: str) -> None:
+        """Stores the plan captured for a slow statement."""
+        if (stats := self.get(q)) is not None:
+            stats.plan = plan
+            self.log.warning(f"Plan for slow query: {stats.query}\n{plan}")
+
+    def top(self, n: int = 10) -> list[QueryStats]:
+        """The statements that spent the most time in the database."""
+        return sorted(self._stats.values(), key=lambda s: s.total_ms, reverse=True)[:n]
@@ -0,0 +1,158 @@
+import asyncio
+import functools
+import re
+import typing as t
+from pathlib import Path
+
+import aiofiles
+
+if t.TYPE_CHECKING:
+    from .db import AsyncPGDatabase
+
+
+class Migration(t.NamedTuple):
+    """A numbered sql file, i.e. `0002_tags_owner_index.sql`."""
+
+    version: int
+    name: str
+    sql: str
+    transactional: bool
+
+
+class MigrationRunner:
+    """Applies pending numbered migrations, and records the schema version.
+
+    Migrations run in a transaction unless their first line is
+    `-- no-transaction`, which is needed for `CREATE INDEX CONCURRENTLY`.
+    Those run one statement at a time, so keep them to one statement
+    per line ending in `;`. Use `IF NOT EXISTS` on their indexes, an
+    index left invalid by a failed build is dropped before a rerun.
+    """
+
+    # Held while migrating, so cluster workers don't migrate at the same time
+    LOCK_ID = 7240416
+
+    NO_TRANSACTION = "-- no-transaction"
+
+    LOCK = "SELECT pg_try_advisory_lock($1);"
+    UNLOCK = "SELECT pg_advisory_unlock($1);"
+    VERSIONS = "SELECT Version FROM schema_migrations;"
+
+    CONCURRENT_INDEX = re.compile(
+        r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)", re.I
+    )
+
+    def __init__(
+        self,
+        pool: "AsyncPGDatabase",
+        path: str = "./jonxhikari/data/migrations",
+        lock_interval: float = 1.0,
+    ) -> None:
+        self.pool = pool
+        self.path = path
+        self.lock_interval = lock_interval
+
+    async def discover(self) -> list[Migration]:
+        """Reads every migration file, in version order."""
+        migrations = []
+
+        for file in Path(self.path).glob("*.sql"):
+            if not (match := re.fullmatch(r"(\d+)_(\w+)", file.stem)):
+                continue
+
+            async with aiofiles.open(file, "r", encoding="utf-8") as script:
+                sql = await script.read()
+
+            migrations.append(
+                Migration(
+                    int(match.group(1)),
+                    match.group(2),
+                    sql,
+                    not sql.startswith(self.NO_TRANSACTION),
+                )
+            )
+
+        return sorted(migrations)
+
+    async def run(self) -> list[Migration]:
+        """Applies every pending migration. Returns the ones applied."""
+        migrations = await self.discover()
+        applied = []
+
+        async with self.pool.acquire() as conn:
+            track = functools.partial(self.pool.statements.track, conn)
+
+            # Poll rather than block in pg_advisory_lock, a blocked call keeps
+            # a snapshot open, and CREATE INDEX CONCURRENTLY waits on those
+            while True:
+                track(self.LOCK)
+                if await conn.fetchval(self.LOCK, self.LOCK_ID):
+                    break
+
+                await asyncio.sleep(self.lock_interval)
+
+            try:
+                await conn.execute(
+                    "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                    "Version int PRIMARY KEY, "
+                    "Name text NOT NULL, "
+                    "AppliedAt timestamptz NOT NULL DEFAULT now());"
+                )
+
+                track(self.VERSIONS)
+                done = {r[0] for r in await conn.fetch(self.VERSIONS)}
+
+                for migration in migrations:
+                    if migration.version in done:
+                        continue
+
+                    if migration.transactional:
+                        async with conn.transaction():
+                            await conn.execute(migration.sql)
+                            await self._record(conn, migration)
+
+                    else:
+                        await self._drop_invalid_indexes(conn, migration)
+
+                        for statement in re.split(r";\s*$", migration.sql, flags=re.M):
+                            if statement.strip() and not self._is_comment(statement):
+                                await conn.execute(statement)
+
+                        await self._record(conn, migration)
+
+                    applied.append(migration)
+
+            finally:
+                track(self.UNLOCK)
+                await conn.execute(self.UNLOCK, self.LOCK_ID)
+
+            if applied:
+                # The schema changed, so prepared statements may be stale
+                await conn.reload_schema_state()
+                self.pool.statements.invalidate()
+
+        return applied
+
+    async def _drop_invalid_indexes(self, conn: t.Any, migration: Migration) -> None:
+        # A failed concurrent build leaves an invalid index, that IF NOT EXISTS would skip
+        names = self.CONCURRENT_INDEX.findall(migration.sql)
+        q = (
+            "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE NOT i.indisvalid AND c.relname = ANY($1::text[]);"
+        )
+        self.pool.statements.track(conn, q)
+        invalid = await conn.fetch(q, [name.lower() for name in names])
+
+        for row in invalid:
+            await conn.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{row[0]}";')
+
+    @staticmethod
+    def _is_comment(statement: str) -> bool:
+        return all(
+            line.strip().startswith("--") for line in statement.splitlines() if line.strip()
+        )
+
+    async def _record(self, conn: t.Any, migration: Migration) -> None:
+        q = "INSERT INTO schema_migrations (Version, Name) VALUES ($1, $2);"
+        self.pool.statements.track(conn, q)
+        await conn.execute(q, migration.version, migration.name)
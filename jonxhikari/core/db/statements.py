@@ -0,0 +1,67 @@
+import collections
+import typing as t
+
+import asyncpg
+
+
+class StatementRegistry:
+    """Keeps track of the statements prepared on each pooled connection.
+
+    asyncpg holds the prepared statements themselves in a per connection
+    LRU cache. This registry mirrors that cache, keyed by query text, so
+    we can see how often a query skips the parse/plan round trip.
+
+    Only queries passed to `track` are counted, so anything run on a
+    pooled connection with arguments (which asyncpg prepares) should be
+    tracked too. Simple queries without arguments aren't prepared, so
+    they are left out.
+    """
+
+    def __init__(self, max_size: int = 128) -> None:
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._statements: dict[int, collections.OrderedDict[str, None]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(s) for s in self._statements.values())
+
+    @property
+    def hit_rate(self) -> float:
+        """The percentage of queries that reused a prepared statement."""
+        total = self.hits + self.misses
+        return self.hits / total * 100 if total else 0.0
+
+    async def register(self, conn: asyncpg.Connection) -> None:
+        """Starts tracking a new pooled connection. Used as the pools `init`."""
+        pid = conn.get_server_pid()
+        self._statements[pid] = collections.OrderedDict()
+        conn.add_termination_listener(lambda _: self.forget(pid))
+
+    def forget(self, pid: int) -> None:
+        """Stops tracking the connection to the given backend."""
+        self._statements.pop(pid, None)
+
+    def clear(self) -> None:
+        """Stops tracking every connection, used when the pool closes."""
+        self._statements.clear()
+
+    def track(self, conn: asyncpg.Connection, q: str) -> None:
+        """Records a use of the given query on the given connection."""
+        statements = self._statements.setdefault(conn.get_server_pid(), collections.OrderedDict())
+
+        if q in statements:
+            statements.move_to_end(q)
+            self.hits += 1
+            return None
+
+        self.misses += 1
+        statements[q] = None
+
+        if len(statements) > self.max_size:
+            statements.popitem(last=False)
+
+    def invalidate(self) -> None:
+        """Forgets every statement, used after the schema changes."""
+        for statements in self._statements.values():
+            statements.clear()
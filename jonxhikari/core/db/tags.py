@@ -0,0 +1,523 @@
+import asyncio
+import bisect
+import math
+import typing as t
+
+from jonxhikari.core.utils import LRUCache
+
+if t.TYPE_CHECKING:
+    from .db import AsyncPGDatabase
+
+
+def trigrams(name: str) -> set[str]:
+    """The trigrams of a name, padded like pg_trgm so short names still match."""
+    padded = f"  {name} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class GuildTags:
+    """One guilds tag names, sorted, with a trigram index built on demand.
+
+    The index gives each name an id, and keeps a bitset of ids per trigram
+    and per trigram count. Counting how many trigrams each name shares
+    with a lookup is then a few big int operations per trigram, rather
+    than walking every posting list, which matters when many names share
+    common words.
+    """
+
+    __slots__ = ("names", "grams", "lengths", "_ids", "_by_id", "_free", "_building")
+
+    def __init__(self, names: list[str]) -> None:
+        self.names = sorted(names)
+        # Trigram: bitset of the ids of names with it
+        self.grams: t.Optional[dict[str, int]] = None
+        # Trigram count: bitset of the ids of names with that many
+        self.lengths: dict[int, int] = {}
+        self._ids: dict[str, int] = {}
+        self._by_id: list[t.Optional[str]] = []
+        self._free: list[int] = []
+        self._building: t.Optional[asyncio.Task[None]] = None
+
+    def __contains__(self, name: object) -> bool:
+        if not isinstance(name, str):
+            return False
+
+        i = bisect.bisect_left(self.names, name)
+        return i < len(self.names) and self.names[i] == name
+
+    def add(self, name: str) -> None:
+        if name in self:
+            return None
+
+        bisect.insort(self.names, name)
+
+        if self.grams is not None:
+            self._index(name)
+
+    def remove(self, name: str) -> None:
+        if name not in self:
+            return None
+
+        del self.names[bisect.bisect_left(self.names, name)]
+
+        if self.grams is not None:
+            self._unindex(name)
+
+    async def build(self, chunk: int = 1000) -> None:
+        """Builds the trigram index, if it isn't built yet.
+
+        Names are indexed `chunk` at a time, yielding to the event loop
+        in between, so a big guild doesn't block it. Concurrent calls
+        share one build.
+        """
+        if self.grams is not None:
+            return None
+
+        if self._building is None:
+            self._building = asyncio.create_task(self._build(chunk))
+
+        await asyncio.shield(self._building)
+
+    def similar(self, name: str, limit: int, threshold: float) -> list[str]:
+        """The closest names by trigram similarity, best first. Needs `build` first."""
+        assert self.grams is not None
+        query = trigrams(name)
+        size = len(query)
+
+        # How many of the querys trigrams each name shares, as bit planes
+        # of a counter, i.e. planes[0] holds the ids with an odd count
+        planes: list[int] = []
+
+        for gram in query:
+            if not (carry := self.grams.get(gram, 0)):
+                continue
+
+            for i, plane in enumerate(planes):
+                planes[i], carry = plane ^ carry, plane & carry
+
+                if not carry:
+                    break
+
+            else:
+                planes.append(carry)
+
+        # A name can't reach the threshold unless it shares this many trigrams
+        needed = max(math.ceil(threshold * size), 1)
+        shared = range(min(size, (1 << len(planes)) - 1), needed - 1, -1)
+
+        # Jaccard similarity, the same measure pg_trgm uses, only depends on the
+        # shared and total trigram counts, so score those pairs rather than names
+        pairs = sorted(
+            (
+                (count / (size + length - count), count, length)
+                for count in shared
+                for length in self.lengths
+                if length >= count
+            ),
+            reverse=True,
+        )
+
+        everyone = (1 << len(self._by_id)) - 1
+        levels: dict[int, int] = {}
+        matches: list[str] = []
+
+        for score, count, length in pairs:
+            # Sorted best first, so nothing after this can make the cut
+            if score < threshold or len(matches) >= limit:
+                break
+
+            if (level := levels.get(count)) is None:
+                level = everyone
+
+                for i, plane in enumerate(planes):
+                    level &= plane if count >> i & 1 else ~plane
+
+                levels[count] = level
+
+            if ids := level & self.lengths[length]:
+                # Names with the same score, in name order
+                found = sorted(t.cast(str, self._by_id[i]) for i in self._bits(ids))
+                matches.extend(found[: limit - len(matches)])
+
+        return matches
+
+    @staticmethod
+    def _bits(ids: int) -> t.Iterator[int]:
+        # str.find skips the zeros in C, far faster than shifting a big int
+        digits = bin(ids)[:1:-1]
+        i = digits.find("1")
+
+        while i != -1:
+            yield i
+            i = digits.find("1", i + 1)
+
+    async def _build(self, chunk: int) -> None:
+        names = list(self.names)
+        postings: dict[str, list[int]] = {}
+        lengths: dict[int, list[int]] = {}
+
+        try:
+            for start in range(0, len(names), chunk):
+                for i, name in enumerate(names[start : start + chunk], start):
+                    found = trigrams(name)
+                    lengths.setdefault(len(found), []).append(i)
+
+                    for gram in found:
+                        postings.setdefault(gram, []).append(i)
+
+                await asyncio.sleep(0)
+
+            grams = {}
+            done = 0
+
+            for gram, ids in postings.items():
+                grams[gram] = self._bitset(ids)
+
+                if (done := done + len(ids)) >= chunk * 10:
+                    done = 0
+                    await asyncio.sleep(0)
+
+        finally:
+            self._building = None
+
+        self.grams = grams
+        self.lengths = {length: self._bitset(ids) for length, ids in lengths.items()}
+        self._ids = {name: i for i, name in enumerate(names)}
+        self._by_id = [*names]
+        self._free = []
+
+        # Catch up with names added or removed while it was building
+        current = set(self.names)
+
+        for name in current.difference(self._ids):
+            self._index(name)
+
+        for name in set(self._ids).difference(current):
+            self._unindex(name)
+
+    @staticmethod
+    def _bitset(ids: list[int]) -> int:
+        # Ids are added in order, so the last is the highest
+        bits = bytearray(ids[-1] // 8 + 1)
+
+        for i in ids:
+            bits[i >> 3] |= 1 << (i & 7)
+
+        return int.from_bytes(bits, "little")
+
+    def _index(self, name: str) -> None:
+        assert self.grams is not None
+
+        if self._free:
+            i = self._free.pop()
+            self._by_id[i] = name
+
+        else:
+            i = len(self._by_id)
+            self._by_id.append(name)
+
+        self._ids[name] = i
+        bit = 1 << i
+        grams = trigrams(name)
+        self.lengths[len(grams)] = self.lengths.get(len(grams), 0) | bit
+
+        for gram in grams:
+            self.grams[gram] = self.grams.get(gram, 0) | bit
+
+    def _unindex(self, name: str) -> None:
+        assert self.grams is not None
+        i = self._ids.pop(name)
+        self._by_id[i] = None
+        self._free.append(i)
+        bit = 1 << i
+        grams = trigrams(name)
+
+        if not (ids := self.lengths[len(grams)] & ~bit):
+            del self.lengths[len(grams)]
+
+        else:
+            self.lengths[len(grams)] = ids
+
+        for gram in grams:
+            if not (ids := self.grams[gram] & ~bit):
+                del self.grams[gram]
+
+            else:
+                self.grams[gram] = ids
+
+
+class TagIndex:
+    """A sorted index of each guilds tag names, for prefix and fuzzy lookups.
+
+    A guild is loaded from the database the first time it is needed,
+    then kept in step by the tags module as tags are created or deleted.
+    Changes made while a guild is loading are applied once it loads.
+    Lookups never wait on Postgres once a guild is loaded. Only the most
+    recently used `max_guilds` are kept.
+    """
+
+    def __init__(self, pool: "AsyncPGDatabase", max_guilds: int = 1024) -> None:
+        self.pool = pool
+        self._guilds: LRUCache[int, GuildTags] = LRUCache(max_guilds)
+        self._pending: dict[int, asyncio.Task[GuildTags]] = {}
+        # (exists, name) for guilds that are loading, in the order they happened
+        self._changes: dict[int, list[tuple[bool, str]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._guilds)
+
+    def __contains__(self, guild_id: object) -> bool:
+        return guild_id in self._guilds
+
+    def add(self, guild_id: int, name: str) -> None:
+        """Adds a name to a loaded, or loading, guild."""
+        if (tags := self._get(guild_id)) is not None:
+            tags.add(name)
+
+        elif (changes := self._changes.get(guild_id)) is not None:
+            changes.append((True, name))
+
+    def remove(self, guild_id: int, name: str) -> None:
+        """Removes a name from a loaded, or loading, guild."""
+        if (tags := self._get(guild_id)) is not None:
+            tags.remove(name)
+
+        elif (changes := self._changes.get(guild_id)) is not None:
+            changes.append((False, name))
+
+    def evict(self, guild_id: int) -> None:
+        """Removes a guild from the index, it's reloaded when next needed."""
+        self._guilds.pop(guild_id)
+
+    def clear(self) -> None:
+        """Removes every guild from the index."""
+        self._guilds.clear()
+
+    def exists(self, guild_id: int, name: str) -> t.Optional[bool]:
+        """Whether a guild has a tag, or None if the guild isn't loaded."""
+        if (tags := self._get(guild_id)) is None:
+            return None
+
+        return name in tags
+
+    def complete(self, guild_id: int, prefix: str, limit: int = 25) -> t.Optional[list[str]]:
+        """Gets up to `limit` names starting with a prefix, in order.
+
+        Returns None if the guild isn't loaded, rather than waiting on it.
+        """
+        if (tags := self._get(guild_id)) is None:
+            return None
+
+        start = bisect.bisect_left(tags.names, prefix := prefix.lower())
+        matches = []
+
+        for name in tags.names[start : start + limit]:
+            if not name.startswith(prefix):
+                break
+
+            matches.append(name)
+
+        return matches
+
+    async def names(self, guild_id: int) -> list[str]:
+        """Gets a guilds sorted tag names, loading them if needed.
+
+        Concurrent loads for the same guild share one query.
+        """
+        return (await self._fetch(guild_id)).names
+
+    async def suggest(self, guild_id: int, prefix: str, limit: int = 25) -> list[str]:
+        """Like `complete`, but loads the guild first if needed."""
+        await self._fetch(guild_id)
+        return self.complete(guild_id, prefix, limit) or []
+
+    async def similar(
+        self, guild_id: int, name: str, limit: int = 5, threshold: float = 0.25
+    ) -> list[str]:
+        """Gets up to `limit` names that look like a name, closest first.
+
+        The default threshold is a little under pg_trgm's 0.3, so a swapped
+        pair of letters in a 6 letter name, i.e. `pyhton`, still matches.
+        The trigram index for a guild is built the first time it's needed.
+        """
+        tags = await self._fetch(guild_id)
+        await tags.build()
+        return tags.similar(name.lower(), limit, threshold)
+
+    def _get(self, guild_id: int) -> t.Optional[GuildTags]:
+        try:
+            return self._guilds[guild_id]
+
+        except KeyError:
+            return None
+
+    async def _fetch(self, guild_id: int) -> GuildTags:
+        if (tags := self._get(guild_id)) is not None:
+            return tags
+
+        if (task := self._pending.get(guild_id)) is None:
+            self._changes[guild_id] = []
+            task = self._pending[guild_id] = asyncio.create_task(self._load(guild_id))
+            task.add_done_callback(lambda _: self._loaded(guild_id))
+
+        return await asyncio.shield(task)
+
+    async def _load(self, guild_id: int) -> GuildTags:
+        tags = GuildTags(
+            await self.pool.column("SELECT TagName FROM tags WHERE GuildID = $1;", guild_id)
+        )
+
+        # The query may or may not have seen these, both are safe to apply again
+        for exists, name in self._changes.pop(guild_id, ()):
+            if exists:
+                tags.add(name)
+
+            else:
+                tags.remove(name)
+
+        self._guilds[guild_id] = tags
+        return tags
+
+    def _loaded(self, guild_id: int) -> None:
+        self._pending.pop(guild_id, None)
+        self._changes.pop(guild_id, None)
+
+
+class TagPager:
+    """Keyset pagination over a guilds tags, ordered by name or uses.
+
+    Each page is read from where the last one left off, using an index,
+    rather than an OFFSET that reads every row before it. Rows are
+    `(TagName, Uses)`.
+    """
+
+    QUERIES = {
+        ("name", False): (
+            "SELECT TagName, Uses FROM tags WHERE GuildID = $1 AND TagName > $3 "
+            "ORDER BY TagName LIMIT $2;"
+        ),
+        ("name", True): (
+            "SELECT TagName, Uses FROM tags WHERE GuildID = $1 AND TagName < $3 "
+            "ORDER BY TagName DESC LIMIT $2;"
+        ),
+        ("uses", False): (
+            "SELECT TagName, Uses FROM tags WHERE GuildID = $1 AND (Uses, TagName) < ($4, $3) "
+            "ORDER BY Uses DESC, TagName DESC LIMIT $2;"
+        ),
+        ("uses", True): (
+            "SELECT TagName, Uses FROM tags WHERE GuildID = $1 AND (Uses, TagName) > ($4, $3) "
+            "ORDER BY Uses, TagName LIMIT $2;"
+        ),
+    }
+
+    def __init__(
+        self, pool: "AsyncPGDatabase", guild_id: int, order: str = "name", per_page: int = 20
+    ) -> None:
+        if order not in ("name", "uses"):
+            raise ValueError("Tags can only be ordered by name or uses.")
+
+        self.pool = pool
+        self.guild_id = guild_id
+        self.order = order
+        self.per_page = per_page
+        self.page = 0
+        self.has_next = False
+        self.rows: list[tuple[t.Any, ...]] = []
+
+    @property
+    def has_prev(self) -> bool:
+        return self.page > 1
+
+    async def first(self) -> list[tuple[t.Any, ...]]:
+        """Reads the first page."""
+        self.page = 0
+        return await self._read(self._start(), backwards=False)
+
+    async def next(self) -> list[tuple[t.Any, ...]]:
+        """Reads the page after the current one.
+
+        If every tag that way has gone since, it starts over from the
+        first page, which may be empty too.
+        """
+        if not self.has_next or not self.rows:
+            return self.rows
+
+        return await self._read(self._key(self.rows[-1]), backwards=False) or await self.first()
+
+    async def prev(self) -> list[tuple[t.Any, ...]]:
+        """Reads the page before the current one, or the first page like `next`."""
+        if not self.has_prev or not self.rows:
+            return self.rows
+
+        return await self._read(self._key(self.rows[0]), backwards=True) or await self.first()
+
+    def _start(self) -> tuple[t.Any, ...]:
+        return ("",) if self.order == "name" else ("", 2 ** 63 - 1)
+
+    def _key(self, row: tuple[t.Any, ...]) -> tuple[t.Any, ...]:
+        return (row[0],) if self.order == "name" else (row[0], row[1])
+
+    def _query(self, backwards: bool) -> tuple[str, tuple[t.Any, ...]]:
+        return self.QUERIES[(self.order, backwards)], ()
+
+    async def _read(self, after: tuple[t.Any, ...], backwards: bool) -> list[tuple[t.Any, ...]]:
+        query, values = self._query(backwards)
+
+        # One extra row tells us whether there is another page that way
+        rows = await self.pool.rows(query, self.guild_id, self.per_page + 1, *after, *values) or []
+
+        more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+
+        if backwards:
+            rows.reverse()
+            self.page -= 1
+            self.has_next = True
+
+        else:
+            self.page += 1
+            self.has_next = more
+
+        self.rows = [tuple(row) for row in rows]
+        return self.rows
+
+
+class TagSearch(TagPager):
+    """Ranked full text search over a guilds tag names and content.
+
+    Pages the same way as `TagPager`, keyed on `(rank, name)`. Rows are
+    `(TagName, Rank, Headline)`, where the headline is a snippet of the
+    content with the matches in bold.
+    """
+
+    SEARCH = (
+        "SELECT TagName, Rank, ts_headline('english', TagContent, query, "
+        "'MaxWords=16, MinWords=6, StartSel=**, StopSel=**') FROM ("
+        "SELECT TagName, TagContent, ts_rank(SearchVector, query) AS Rank, query "
+        "FROM tags, websearch_to_tsquery('english', $5) query "
+        "WHERE GuildID = $1 AND SearchVector @@ query "
+        "AND (ts_rank(SearchVector, query), TagName) {op} ($4, $3) "
+        "ORDER BY Rank {dir}, TagName {dir} LIMIT $2"
+        ") page ORDER BY Rank {dir}, TagName {dir};"
+    )
+
+    QUERIES = {
+        ("rank", False): SEARCH.format(op="<", dir="DESC"),
+        ("rank", True): SEARCH.format(op=">", dir="ASC"),
+    }
+
+    def __init__(
+        self, pool: "AsyncPGDatabase", guild_id: int, query: str, per_page: int = 10
+    ) -> None:
+        super().__init__(pool, guild_id, per_page=per_page)
+        self.order = "rank"
+        self.query = query
+
+    def _start(self) -> tuple[t.Any, ...]:
+        return ("", float("inf"))
+
+    def _key(self, row: tuple[t.Any, ...]) -> tuple[t.Any, ...]:
+        return (row[0], row[1])
+
+    def _query(self, backwards: bool) -> tuple[str, tuple[t.Any, ...]]:
+        return self.QUERIES[(self.order, backwards)], (self.query,)
@@ -3,15 +3,15 @@ import typing as t
 import hikari
 import tanjun
 
-from jonxhikari import Config, SlashClient, Bot
+from jonxhikari import Settings, SlashClient, Bot
 
 
 component = tanjun.Component()
 
 
-async def call_cat_api(bot: Bot) -> str:
+async def call_cat_api(bot: Bot, settings: Settings) -> str:
     url = "https://api.thecatapi.com/v1/images/search"
-    headers = {"x-api-key": Config.env("CAT_API_KEY")}
+    headers = {"x-api-key": settings.cat_api_key}
 
     async with bot.session.get(url, headers=headers) as response:
         if not 200 <= response.status <= 299:
@@ -29,9 +29,10 @@ async def call_cat_api(bot: Bot) -> str:
 async def kitties_command(
     ctx: tanjun.abc.Context,
     bot: Bot = tanjun.injected(type=Bot),
+    settings: Settings = tanjun.injected(type=Settings),
 ) -> None:
     assert isinstance(ctx.client, SlashClient)
-    if not (url := await call_cat_api(bot)):
+    if not (url := await call_cat_api(bot, settings)):
         await ctx.respond(
             bot.errors.embed(ctx.client, "Unable to fetch a kitty right now :(")
         )
@@ -26,7 +26,15 @@ async def config_starboard(
             bot.errors.embed(ctx, "Can only set the stardboard channel to a guild text channel.")
         )
         return 
-    #await bot.pool.execute("UPDATE guilds SET StarChannel = $1 WHERE GuildID = $2;", channel.id, )
+
+    assert ctx.guild_id is not None
+    await bot.pool.mutate(
+        "UPDATE guilds SET StarChannel = $1 WHERE GuildID = $2",
+        channel.id,
+        ctx.guild_id,
+        notify=bot.bus.notification("starboard", guild=ctx.guild_id, channel=channel.id),
+    )
+    bot.guilds.set_star_channel(ctx.guild_id, channel.id)
 
     await ctx.respond(f"The channel you selected was {channel.mention}")
 
@@ -5,6 +5,7 @@ import hikari
 import tanjun
 
 from jonxhikari import SlashClient, Bot
+from jonxhikari.core import TagPager, TagSearch
 
 
 component = tanjun.Component()
@@ -18,9 +19,25 @@ RESERVED_TAGS = (
     "list",
     "transfer",
     "get",
+    "search",
 )
 
 
+async def not_found(bot: Bot, guild_id: int, name: str, message: str) -> str:
+    """Adds the closest tag names to the missing name to an error message."""
+    names = await bot.tag_names.suggest(guild_id, name, 5)
+
+    # Then fill up with typos, i.e. `pyhton` for `python`
+    for similar in await bot.tag_names.similar(guild_id, name, 5):
+        if len(names) < 5 and similar not in names:
+            names.append(similar)
+
+    if names:
+        message += "\nDid you mean: " + ", ".join(f"`{n}`" for n in names)
+
+    return message
+
+
 tag_group = component.with_slash_command(
     tanjun.SlashCommandGroup("tag", "Slash command group related to tags.")
 ).add_check(lambda ctx: ctx.guild_id is not None)
@@ -35,15 +52,37 @@ async def tag_get_slash_command(
     bot: Bot = tanjun.injected(type=Bot),
 ) -> None:
     """Gets a tag from the database."""
-    query = (
-        "UPDATE tags SET Uses = Uses + 1 WHERE GuildID = $1 AND TagName = $2 RETURNING TagContent;"
-    )
+    assert ctx.guild_id is not None
+    key = (ctx.guild_id, name := name.lower())
+
+    try:
+        content = bot.tags[key]
+
+    except KeyError:
+        if bot.tag_names.exists(*key) is False:
+            # The guild is indexed, so we already know it doesn't exist
+            content = bot.tags[key] = None
+
+        else:
+            # Cache the miss too, so made up names don't keep hitting the db. Skipped
+            # if the tag is written while we read it, since the read may be stale
+            content = await bot.tags.fill(
+                key,
+                lambda: bot.pool.fetch(
+                    "SELECT TagContent FROM tags WHERE GuildID = $1 AND TagName = $2;", *key
+                ),
+            )
 
-    if content := await bot.pool.fetch(query, ctx.guild_id, name.lower()):
+    if content:
+        bot.tag_uses.add(ctx.guild_id, name)
         await ctx.respond(content)
         return None
 
-    await ctx.respond(bot.errors.embed(ctx, f"`{name}` is not a valid tag."))
+    await ctx.respond(
+        bot.errors.embed(
+            ctx, await not_found(bot, ctx.guild_id, name, f"`{name}` is not a valid tag.")
+        )
+    )
 
 
 @tag_group.with_command
@@ -75,10 +114,15 @@ async def tag_info_slash_command(
     elif name:
         query = "SELECT TagOwner, Uses FROM tags WHERE TagName = $1 AND GuildID = $2;"
 
+        assert ctx.guild_id is not None
+
         if not (tag_name_info := await bot.pool.row(query, name.lower(), ctx.guild_id)):
-            await ctx.respond(bot.errors.embed(ctx, f"No `{name}` tag exists."))
+            message = await not_found(bot, ctx.guild_id, name.lower(), f"No `{name}` tag exists.")
+            await ctx.respond(bot.errors.embed(ctx, message))
             return None
 
+        uses = tag_name_info[1] + bot.tag_uses.pending(ctx.guild_id, name.lower())
+
         await ctx.respond(
             bot.embeds.build(
                 ctx=ctx,
@@ -87,7 +131,7 @@ async def tag_info_slash_command(
                 description=f"Requested tag: `{name}`" "",
                 fields=[
                     ("Owner", f"<@!{tag_name_info[0]}>", True),
-                    ("Uses", tag_name_info[1], True),
+                    ("Uses", uses, True),
                 ],
             )
         )
@@ -101,10 +145,16 @@ async def tag_info_slash_command(
             )
             return None
 
-        assert tag_member_info is not None
+        assert tag_member_info is not None and ctx.guild_id is not None
         fields = [
             ("Name", "\n".join(t[0] for t in tag_member_info), True),
-            ("Uses", "\n".join(str(t[1]) for t in tag_member_info), True),
+            (
+                "Uses",
+                "\n".join(
+                    str(t[1] + bot.tag_uses.pending(ctx.guild_id, t[0])) for t in tag_member_info
+                ),
+                True,
+            ),
         ]
 
         await ctx.respond(
@@ -118,32 +168,118 @@ async def tag_info_slash_command(
         )
 
 
+async def paginate(
+    ctx: tanjun.abc.Context,
+    bot: Bot,
+    pager: TagPager,
+    title: str,
+    render: t.Callable[[list[tuple[t.Any, ...]]], str],
+) -> None:
+    """Shows a pagers first page, with buttons to read the others.
+
+    Pages are only read as they are asked for.
+    """
+
+    def page() -> hikari.Embed:
+        return bot.embeds.build(
+            ctx=ctx,
+            footer=f"Page {pager.page}",
+            title=title,
+            description=render(pager.rows),
+        )
+
+    def buttons() -> hikari.api.ActionRowBuilder:
+        return (
+            ctx.rest.build_action_row()
+            .add_button(hikari.ButtonStyle.SECONDARY, "prev")
+            .set_label("Prev")
+            .set_is_disabled(not pager.has_prev)
+            .add_to_container()
+            .add_button(hikari.ButtonStyle.SECONDARY, "next")
+            .set_label("Next")
+            .set_is_disabled(not pager.has_next)
+            .add_to_container()
+        )
+
+    if not pager.has_next:
+        await ctx.respond(page())
+        return None
+
+    message = await ctx.respond(page(), ensure_result=True, component=buttons())
+
+    async with bot.components.listen(message, ctx.author, 60) as listener:
+        async for interaction in listener:
+            await (pager.next() if interaction.custom_id == "next" else pager.prev())
+            await interaction.create_initial_response(
+                hikari.ResponseType.MESSAGE_UPDATE, embed=page(), component=buttons()
+            )
+
+    await ctx.edit_last_response(components=[])
+
+
 @tag_group.with_command
+@tanjun.with_str_slash_option(
+    "order", "How to order the tags.", choices=("name", "uses"), default="name"
+)
 @tanjun.as_slash_command("list", "List this guilds tags.")
 async def tag_list__slash_command(
     ctx: tanjun.abc.Context,
+    order: str,
     bot: Bot = tanjun.injected(type=Bot),
 ) -> None:
-    """Command for listing all tags."""
-    query = "SELECT TagName FROM tags WHERE GuildID = $1;"
-    tags = await bot.pool.column(query, ctx.guild_id)
+    """Command for listing all tags, a page at a time."""
+    assert ctx.guild_id is not None
+    pager = TagPager(bot.pool, ctx.guild_id, order)
 
     # If there are no tags stored
-    if not len(tags):
+    if not await pager.first():
         await ctx.respond(bot.errors.embed(ctx, "No tags for this guild yet, make one!"))
         return None
 
+    def render(rows: list[tuple[t.Any, ...]]) -> str:
+        # Every tag may have been deleted or transferred while paging
+        if not rows:
+            return "No tags left for this guild."
+
+        width = max((len(name) for name, _ in rows), default=0)
+        lines = "\n".join(
+            f"{name:<{width}} {uses + bot.tag_uses.pending(pager.guild_id, name)}"
+            for name, uses in rows
+        )
+
+        return f"```{lines}```"
+
+    guild = bot.cache.get_guild(ctx.guild_id)
+    title = f"{bot.yes} Tags for {guild.name if guild else 'this guild'}"
+    await paginate(ctx, bot, pager, title, render)
+
+
+@tag_group.with_command
+@tanjun.with_str_slash_option("query", "The words to search for.")
+@tanjun.as_slash_command("search", "Search this guilds tag names and content.")
+async def tag_search_slash_command(
+    ctx: tanjun.abc.Context,
+    query: str,
+    bot: Bot = tanjun.injected(type=Bot),
+) -> None:
+    """Command for searching tags, best matches first."""
     assert ctx.guild_id is not None
-    description: str = "\n".join(str(t) for t in tags)
+    pager = TagSearch(bot.pool, ctx.guild_id, query)
 
-    await ctx.respond(
-        bot.embeds.build(
-            ctx=ctx,
-            footer="BYPASS",
-            title=f"{bot.yes} Tags for {(await ctx.client.rest.fetch_guild(ctx.guild_id)).name}",
-            description=f"```{description}```",
+    if not await pager.first():
+        await ctx.respond(bot.errors.embed(ctx, f"No tags match `{query}`."))
+        return None
+
+    def render(rows: list[tuple[t.Any, ...]]) -> str:
+        if not rows:
+            return f"No tags match `{query}` any more."
+
+        # Headlines are snippets of user content, keep them to one short line
+        return "\n".join(
+            f"`{name}` - {' '.join(headline.split())[:150]}" for name, _, headline in rows
         )
-    )
+
+    await paginate(ctx, bot, pager, f"{bot.yes} Tags matching `{query}`", render)
 
 
 @tag_group.with_command
@@ -169,10 +305,12 @@ async def tag_create_slash_command(
 
     # If someone tries to make an already made tag... yeah thats a use :kek:
     elif owner := await bot.pool.fetch(
-        "UPDATE tags SET Uses = Uses + 1 WHERE GuildID = $1 AND TagName = $2 RETURNING TagOwner;",
+        "SELECT TagOwner FROM tags WHERE GuildID = $1 AND TagName = $2;",
         ctx.guild_id,
         name,
     ):
+        assert ctx.guild_id is not None
+        bot.tag_uses.add(ctx.guild_id, name)
         await ctx.respond(
             bot.errors.embed(
                 ctx,
@@ -182,13 +320,17 @@ async def tag_create_slash_command(
         return None
 
     # A successful tag creation
-    await bot.pool.execute(
-        "INSERT INTO tags (guildid, tagowner, tagname, tagcontent) VALUES ($1, $2, $3, $4);",
+    await bot.pool.mutate(
+        "INSERT INTO tags (guildid, tagowner, tagname, tagcontent) VALUES ($1, $2, $3, $4)",
         ctx.guild_id,
         ctx.author.id,
         name,
         content,
+        notify=bot.bus.notification("tag", guild=ctx.guild_id, name=name, exists=True),
     )
+    assert ctx.guild_id is not None
+    bot.tags[(ctx.guild_id, name)] = content
+    bot.tag_names.add(ctx.guild_id, name)
 
     await ctx.respond(
         bot.embeds.build(
@@ -212,27 +354,31 @@ async def tag_edit_slash_command(
     """Command for editing a tag you own."""
     name = name.lower()
 
-    if owner := await bot.pool.fetch(
-        "SELECT TagOwner FROM tags WHERE GuildID = $1 AND TagName = $2;", ctx.guild_id, name
-    ):
-        # A successful tag edit
-        if owner == ctx.author.id:
-            await bot.pool.execute(
-                "UPDATE tags SET TagContent = $1 WHERE TagName = $2 AND GuildID = $3;",
-                content,
-                name,
-                ctx.guild_id,
-            )
-            await ctx.respond(
-                bot.embeds.build(
-                    ctx=ctx,
-                    footer="BYPASS",
-                    description=f"{bot.yes} `{name}` tag edited by {ctx.author.mention}.",
-                )
+    owner, edited = await bot.pool.conditional(
+        "SELECT TagOwner FROM tags WHERE GuildID = $1 AND TagName = $2",
+        "UPDATE tags SET TagContent = $4 WHERE GuildID = $1 AND TagName = $2 AND TagOwner = $3",
+        ctx.guild_id,
+        name,
+        ctx.author.id,
+        content,
+        notify=bot.bus.notification("tag", guild=ctx.guild_id, name=name, exists=True),
+    )
+
+    # A successful tag edit
+    if edited:
+        assert ctx.guild_id is not None
+        bot.tags[(ctx.guild_id, name)] = content
+        await ctx.respond(
+            bot.embeds.build(
+                ctx=ctx,
+                footer="BYPASS",
+                description=f"{bot.yes} `{name}` tag edited by {ctx.author.mention}.",
             )
-            return None
+        )
+        return None
 
-        # Author doesn't own the tag
+    # Author doesn't own the tag
+    if owner:
         await ctx.respond(
             bot.errors.embed(ctx, f"<@!{owner}> owns the `{name}` tag, you cannot edit it.")
         )
@@ -262,25 +408,22 @@ async def tag_edit_slash_command(
         ),
     )
 
-    # Stream interaction create events
-    async with bot.stream(hikari.InteractionCreateEvent, 30).filter(
-        # Filter out events that arent our author and message
-        lambda e: (
-            isinstance(e.interaction, hikari.ComponentInteraction)
-            and e.interaction.user == ctx.author
-            and e.interaction.message == i_message
-        )
-    ) as stream:
-        async for event in stream:
-            if event.interaction.custom_id == "yes":
-                await bot.pool.execute(
+    # Wait for the author to press one of the buttons
+    async with bot.components.listen(i_message, ctx.author, 30) as listener:
+        if (interaction := await listener.wait()) is not None:
+            if interaction.custom_id == "yes":
+                await bot.pool.mutate(
                     "INSERT INTO tags (GuildID, TagOwner, TagName, TagContent) "
-                    "VALUES ($1, $2, $3, $4);",
+                    "VALUES ($1, $2, $3, $4)",
                     ctx.guild_id,
                     ctx.author.id,
                     name,
                     content,
+                    notify=bot.bus.notification("tag", guild=ctx.guild_id, name=name, exists=True),
                 )
+                assert ctx.guild_id is not None
+                bot.tags[(ctx.guild_id, name)] = content
+                bot.tag_names.add(ctx.guild_id, name)
                 await ctx.edit_last_response(
                     components=[],
                     embed=bot.embeds.build(
@@ -293,12 +436,11 @@ async def tag_edit_slash_command(
                 )
                 return None
 
-            elif event.interaction.custom_id == "no":
-                await ctx.edit_last_response(
-                    embed=bot.errors.embed(ctx, f"Not creating new tag `{name}`"),
-                    components=[],
-                )
-                return None
+            await ctx.edit_last_response(
+                embed=bot.errors.embed(ctx, f"Not creating new tag `{name}`"),
+                components=[],
+            )
+            return None
 
     await ctx.edit_last_response(
         embed=bot.errors.embed(ctx, f"No `{name}` tag exists to edit."),
@@ -319,32 +461,31 @@ async def tag_transfer_slash_command(
     """Command for transferring a tag you own to someone else."""
     name = name.lower()
 
-    if owner := await bot.pool.fetch(
-        "SELECT TagOwner FROM tags WHERE GuildID = $1 AND TagName = $2;",
+    owner, transferred = await bot.pool.conditional(
+        "SELECT TagOwner FROM tags WHERE GuildID = $1 AND TagName = $2",
+        "UPDATE tags SET TagOwner = $4 WHERE GuildID = $1 AND TagName = $2 AND TagOwner = $3",
         ctx.guild_id,
         name,
-    ):
-        # A successful transfer
-        if owner == ctx.author.id:
-            await bot.pool.execute(
-                "UPDATE tags SET TagOwner = $1 WHERE GuildID = $2 AND TagName = $3;",
-                member.id,
-                ctx.guild_id,
-                name,
-            )
-            await ctx.respond(
-                bot.embeds.build(
-                    ctx=ctx,
-                    footer="BYPASS",
-                    description=(
-                        f"{bot.yes} `{name}` tag transferred "
-                        f"from {ctx.author.mention} to {member.mention}."
-                    ),
-                )
+        ctx.author.id,
+        member.id,
+    )
+
+    # A successful transfer
+    if transferred:
+        await ctx.respond(
+            bot.embeds.build(
+                ctx=ctx,
+                footer="BYPASS",
+                description=(
+                    f"{bot.yes} `{name}` tag transferred "
+                    f"from {ctx.author.mention} to {member.mention}."
+                ),
             )
-            return None
+        )
+        return None
 
-        # Can't transfer a tag they don't own
+    # Can't transfer a tag they don't own
+    if owner:
         await ctx.respond(
             bot.errors.embed(
                 ctx, f"<@!{owner}> owns the `{name}` tag, you cannot transfer it."
@@ -353,7 +494,12 @@ async def tag_transfer_slash_command(
         return None
 
     # Can't transfer a tag that doesn't exist
-    await ctx.respond(bot.errors.embed(ctx, f"No `{name}` tag exists to transfer."))
+    assert ctx.guild_id is not None
+    await ctx.respond(
+        bot.errors.embed(
+            ctx, await not_found(bot, ctx.guild_id, name, f"No `{name}` tag exists to transfer.")
+        )
+    )
 
 
 @tag_group.with_command
@@ -367,24 +513,32 @@ async def tag_delete_slash_command(
     """Command for deleting a tag you own."""
     name = name.lower()
 
-    if owner := await bot.pool.fetch(
-        "SELECT TagOwner FROM tags WHERE GuildID = $1 AND TagName = $2;", ctx.guild_id, name
-    ):
-        # A successful deletion
-        if owner == ctx.author.id:
-            await bot.pool.execute(
-                "DELETE FROM tags WHERE GuildID = $1 AND TagName = $2;", ctx.guild_id, name
-            )
-            await ctx.respond(
-                bot.embeds.build(
-                    ctx=ctx,
-                    footer="BYPASS",
-                    description=f"{bot.yes} `{name}` tag deleted by {ctx.author.mention}.",
-                )
+    owner, deleted = await bot.pool.conditional(
+        "SELECT TagOwner FROM tags WHERE GuildID = $1 AND TagName = $2",
+        "DELETE FROM tags WHERE GuildID = $1 AND TagName = $2 AND TagOwner = $3",
+        ctx.guild_id,
+        name,
+        ctx.author.id,
+        notify=bot.bus.notification("tag", guild=ctx.guild_id, name=name, exists=False),
+    )
+
+    # A successful deletion
+    if deleted:
+        assert ctx.guild_id is not None
+        bot.tag_uses.discard(ctx.guild_id, name)
+        bot.tags[(ctx.guild_id, name)] = None
+        bot.tag_names.remove(ctx.guild_id, name)
+        await ctx.respond(
+            bot.embeds.build(
+                ctx=ctx,
+                footer="BYPASS",
+                description=f"{bot.yes} `{name}` tag deleted by {ctx.author.mention}.",
             )
-            return None
+        )
+        return None
 
-        # Can't delete a tag they don't own
+    # Can't delete a tag they don't own
+    if owner:
         await ctx.respond(
             bot.errors.embed(
                 ctx, f"<@!{owner}> owns the `{name}` tag, you cannot delete it."
@@ -393,7 +547,12 @@ async def tag_delete_slash_command(
         return None
 
     # Can't delete a tag that doesn't exist
-    await ctx.respond(bot.errors.embed(ctx, f"No `{name}` tag exists to delete."))
+    assert ctx.guild_id is not None
+    await ctx.respond(
+        bot.errors.embed(
+            ctx, await not_found(bot, ctx.guild_id, name, f"No `{name}` tag exists to delete.")
+        )
+    )
 
 
 @tanjun.as_loader
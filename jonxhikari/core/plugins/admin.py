@@ -24,7 +24,7 @@ class Admin(lightbulb.Plugin):
         """View or change Jxhk's command prefix."""
         if not _prefix:
             await ctx.respond(
-                f"The current prefix is `{self.bot.guilds[ctx.guild_id]['prefix']}`."
+                f"The current prefix is `{await self.bot.resolve_prefix(self.bot, ctx.message)}`."
             )
             return None
 
@@ -32,10 +32,13 @@ class Admin(lightbulb.Plugin):
             await ctx.respond("The prefix can have a max of 3 characters.")
             return None
 
-        self.bot.guilds[ctx.guild_id]["prefix"] = _prefix
-        await self.bot.pool.execute(
-            "UPDATE guilds SET Prefix = $1 WHERE GuildID = $2;", _prefix, ctx.guild_id
+        await self.bot.pool.mutate(
+            "UPDATE guilds SET Prefix = $1 WHERE GuildID = $2",
+            _prefix,
+            ctx.guild_id,
+            notify=self.bot.bus.notification("prefix", guild=ctx.guild_id, prefix=_prefix),
         )
+        self.bot.guilds.set_prefix(ctx.guild_id, _prefix)
         await ctx.respond(f"Prefix successfully updated to: `{_prefix}`")
 
 
@@ -118,6 +121,43 @@ class Owner(lightbulb.Plugin):
             embed=self.bot.embeds.build(ctx=ctx, fields=fields, header="Unloading...")
         )
 
+    @lightbulb.check(lightbulb.owner_only)
+    @lightbulb.command(name="dbstats")
+    async def dbstats_cmd(self, ctx: lightbulb.Context, count: int = 5) -> None:
+        """Shows the statements that spent the most time in the database."""
+        fields = []
+
+        for stats in self.bot.pool.metrics.top(min(max(count, 1), 8)):
+            p50, p95, p99 = stats.percentiles()
+            query = stats.query if len(stats.query) <= 200 else f"{stats.query[:197]}..."
+
+            fields.append(("Statement", f"```sql\n{query}```", False))
+            fields.append(
+                (
+                    "Stats",
+                    f"```{stats.calls:,} calls | {stats.rows:,} rows\n"
+                    + f"p50 {p50:,.2f} ms | p95 {p95:,.2f} ms | p99 {p99:,.2f} ms\n"
+                    + f"acquire {stats.acquire_ms / stats.calls:,.2f} ms | "
+                    + f"execute {stats.execute_ms / stats.calls:,.2f} ms (avg)"
+                    + ("\nplan captured, see logs" if stats.plan else "")
+                    + "```",
+                    False,
+                )
+            )
+
+        await ctx.respond(
+            embed=self.bot.embeds.build(
+                ctx=ctx,
+                fields=fields,
+                header="Database",
+                description=(
+                    f"Top statements by total time, of {len(self.bot.pool.metrics):,} tracked."
+                    if fields
+                    else "No statements recorded yet."
+                ),
+            )
+        )
+
     @lightbulb.check(lightbulb.owner_only)
     @lightbulb.command(name="shutdown")
     async def shutdown_cmd(self, ctx: lightbulb.Context) -> None:
@@ -1,9 +1,12 @@
+import asyncio
 import re
+import typing as t
 
 import lightbulb
 import hikari
 
 import jonxhikari
+from jonxhikari.core.utils import PistonError, PistonQueue, ResultCache, RuntimeCatalogue
 
 
 class Compile(lightbulb.Plugin):
@@ -12,35 +15,33 @@ class Compile(lightbulb.Plugin):
     def __init__(self, bot: jonxhikari.Bot) -> None:
         super().__init__()
         self.bot = bot
-        self.langs: list[str] = []
         self.uri = "https://emkc.org/api/v2/piston"
+        self.runtimes = RuntimeCatalogue(self.uri)
+        self.results = ResultCache()
+        self.queue = PistonQueue(self.uri, self.bot.session)
+
+        # Ready before the first run command, and kept fresh after that
+        self._loading = asyncio.create_task(self.runtimes.load(self.bot.session))
+        self._refresh = self.bot.scheduler.add_job(
+            self.runtimes.refresh, "interval", seconds=self.runtimes.ttl, args=(self.bot.session,)
+        )
 
-    async def get_langs(self) -> None:
-        """Gets available language details from Piston api."""
-        uri = self.uri + "/runtimes"
-
-        async with self.bot.session.get(uri) as response:
-            if not 200 <= response.status <= 299:
-                return None
-
-            if not (data := await response.json()):
-                return None
-
-        self.resolve_langs(*data)
-
-    def resolve_langs(self, *data: dict[str, str]) -> None:
-        """Saves raw language data to cache."""
-        for lang in data:
-            self.langs.append(lang["language"])
-            self.langs.extend(a for a in lang["aliases"])
+    def plugin_remove(self) -> None:
+        self._loading.cancel()
+        self._refresh.remove()
+        self.queue.close()
 
     @lightbulb.command(name="run")
     async def run_cmd(self, ctx: lightbulb.Context, *, code: str) -> None:
-        """Sends code to the Piston api to be executed."""
-        uri = self.uri + "/execute"
+        """Sends code to the Piston api to be executed.
+
+        Start with `--fresh` to skip the result cache, i.e. for random output.
+        """
+        if fresh := code.startswith("--fresh"):
+            code = code[len("--fresh") :].lstrip()
 
-        if not self.langs:
-            await self.get_langs()
+        if not self._loading.done():
+            await asyncio.shield(self._loading)
 
         if not (matches := re.match(r"```(\w+)\s([\w\W]+)[\s*]?```", code)):
             output = f"{await self.bot.resolve_prefix(self.bot, ctx.message)}run \`\`\`python\nprint('This is a test')\`\`\`" #type: ignore
@@ -53,34 +54,47 @@ class Compile(lightbulb.Plugin):
         lang = matches.group(1)
         source = matches.group(2)
 
-        if lang not in self.langs:
+        if not (runtime := self.runtimes.resolve(lang)):
             await ctx.respond(f"{lang} is not a supported language.", reply=True)
             return None
 
-        data = {
-            "language": lang,
-            "version": "*",
+        payload: dict[str, t.Any] = {
+            "language": runtime[0],
+            "version": runtime[1],
             "files": [{"content": source}],
         }
 
-        async with self.bot.session.post(uri, json=data) as response:
-            if not 200 <= response.status <= 299:
-                return None
+        key = self.results.key(runtime[0], runtime[1], source)
 
-            if not (data := await response.json()):
+        if (cached := None if fresh else self.results.get(key)) is not None:
+            result = cached
+
+        else:
+            try:
+                # Identical runs share one request, unless they're meant to differ
+                result = await self.queue.execute(
+                    ctx.author.id, f"{key}:{ctx.message.id}" if fresh else key, payload
+                )
+
+            except PistonError as e:
+                await ctx.respond(str(e), reply=True)
                 return None
 
+            # A run killed by a signal, i.e. timed out, might not do the same again
+            if not fresh and result["run"].get("signal") is None:
+                self.results.set(key, result)
+
         fields = [
-            ("Language:", f"```{data['language'].title()}```", True),
-            ("Version:", f"```{data['version']}```", True),
+            ("Language:", f"```{result['language'].title()}```", True),
+            ("Version:", f"```{result['version']}```", True),
         ]
 
-        if stdout := data["run"]["stdout"]:
+        if stdout := result["run"]["stdout"]:
             color = hikari.Color.from_rgb(0, 210, 0)
 
             fields.append(("Output:", f"```{stdout}```", False))
 
-        if stderr := data["run"]["stderr"]:
+        if stderr := result["run"]["stderr"]:
             color = hikari.Color.from_rgb(210, 0, 0)
 
             fields.append(("Errors:", f"```{stderr}```", False))
@@ -91,6 +105,7 @@ class Compile(lightbulb.Plugin):
                 fields=fields,
                 color=color, #type: ignore
                 header="Source code evaluation results",
+                footer=f"Invoked by: {ctx.author.username} | Cached result" if cached else None,
             ),
             reply=True,
         )
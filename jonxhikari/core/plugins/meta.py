@@ -45,14 +45,18 @@ class Meta(lightbulb.Plugin):
             mem_usage = mem_total * (mem_of_total / 100)
 
         distro_ = distro.linux_distribution(full_distribution_name=False)
+
+        # Member counts come with the guild, so we don't need the member intents
+        guild = self.bot.cache.get_guild(ctx.guild_id) if ctx.guild_id else None
+        users = sum(g.member_count or 0 for g in self.bot.cache.get_guilds_view().values())
         code_p, docs_p, blank_p = self.lines.grab_percents()
 
         fields = [
             ("Jxhk", f"```{self.bot.version}```", True),
             ("Python", f"```{python_version()}```", True),
             ("Hikari", f"```{hikari.__version__}```", True),
-            ("Users here", f"```{len(self.bot.rest.fetch_members(ctx.guild_id)):,}```", True),
-            ("Total users", f"```{len(self.bot.cache.get_users_view()):,}```", True),
+            ("Users here", f"```{(guild.member_count or 0) if guild else 0:,}```", True),
+            ("Total users", f"```{users:,}```", True),
             ("Servers", f"```{len(self.bot.guilds):,}```", True),
             ("Lines of code", f"```{self.lines.total:,}```", True),
             ("Latency", f"```{self.bot.heartbeat_latency * 1000:,.0f} ms```", True),
@@ -83,8 +87,52 @@ class Meta(lightbulb.Plugin):
                 + f" / minute)```",
                 False,
             ),
+            (
+                "Database pool",
+                f"```{self.bot.pool.in_use} / {self.bot.pool.max_size} in use | "
+                + f"{self.bot.pool.waiting} waiting | {self.bot.pool.avg_wait * 1000:,.2f} ms avg wait | "
+                + f"{self.bot.pool.rejected:,} rejected```",
+                False,
+            ),
+            (
+                "Prepared statements",
+                f"```{self.bot.pool.statements.hits:,} hits | "
+                + f"{self.bot.pool.statements.misses:,} misses "
+                + f"({self.bot.pool.statements.hit_rate:.2f}%)```",
+                False,
+            ),
+            (
+                "Tag cache",
+                f"```{len(self.bot.tags):,} / {self.bot.tags.max_size:,} tags | "
+                + f"{self.bot.tags.hit_rate:.2f}% hit rate```",
+                False,
+            ),
         ]
 
+        if (compile_ := self.bot.get_plugin("Compile")) is not None:
+            queue = compile_.queue
+            fields.append(
+                (
+                    "Piston queue",
+                    f"```{queue.depth} waiting (peak {queue.peak_depth}) | "
+                    + f"{queue.in_flight} / {queue.concurrency} running | "
+                    + f"{queue.deduped:,} deduped | {queue.retries:,} retries | "
+                    + f"{queue.failures:,} failed```",
+                    False,
+                )
+            )
+
+        if self.bot.cluster is not None:
+            totals = self.bot.cluster.totals()
+            fields.append(
+                (
+                    f"Cluster (worker {self.bot.worker + 1} of {self.bot.cluster.workers})",
+                    f"```{totals['guilds']:,} servers | {totals['invokes']:,} invokes | "
+                    + f"{totals['db_calls']:,} DB calls```",
+                    False,
+                )
+            )
+
         await ctx.respond(
             embed=self.bot.embeds.build(
                 ctx=ctx,
@@ -0,0 +1,269 @@
+import asyncio
+import logging
+import typing as t
+
+import hikari
+
+from .utils import LRUCache
+
+if t.TYPE_CHECKING:
+    from .db import AsyncPGDatabase
+    from .db import GuildCache
+
+
+class PendingStars:
+    """The star reactions on one message since its last flush."""
+
+    __slots__ = ("guild_id", "channel_id", "delta", "reset")
+
+    def __init__(self, guild_id: int, channel_id: int) -> None:
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.delta = 0
+        # Every star was removed at once, so the count starts over
+        self.reset = False
+
+
+class Starboard:
+    """Keeps starboard messages in step with star reactions.
+
+    A popular message can get hundreds of stars in a few seconds, so
+    reactions are only counted as they arrive. `window` seconds after the
+    first star on a message, its net change is written with one upsert,
+    and its starboard message is created or edited once.
+
+    The starboard channel comes from the guild cache, and recently
+    starred messages are kept in an LRU index, so handling a reaction
+    never reads from the database. A guild that isn't cached is still
+    counted, and its settings are read when the stars are flushed.
+    Stars on a starboard post count towards the message it shows.
+    """
+
+    EMOJI = "⭐"
+
+    # Only inserts when stars were added, un-starring an unknown message writes nothing
+    UPSERT = (
+        "WITH updated AS ("
+        "UPDATE starboard SET Stars = GREATEST(CASE WHEN $4 THEN 0 ELSE Stars END + $3, 0) "
+        "WHERE BaseMessageID = $1 AND GuildID = $2 RETURNING StarMessageID, Stars"
+        "), inserted AS ("
+        "INSERT INTO starboard (BaseMessageID, GuildID, Stars) "
+        "SELECT $1, $2, $3 WHERE $3 > 0 AND NOT EXISTS (SELECT 1 FROM updated) "
+        "ON CONFLICT (BaseMessageID, GuildID) DO UPDATE SET Stars = GREATEST("
+        "CASE WHEN $4 THEN 0 ELSE starboard.Stars END + $3, 0) "
+        "RETURNING StarMessageID, Stars"
+        ") SELECT * FROM updated UNION ALL SELECT * FROM inserted;"
+    )
+
+    def __init__(
+        self,
+        pool: "AsyncPGDatabase",
+        guilds: "GuildCache",
+        rest: hikari.api.RESTClient,
+        window: float = 2.0,
+        index_size: int = 4096,
+    ) -> None:
+        self.pool = pool
+        self.guilds = guilds
+        self.rest = rest
+        self.window = window
+        self.log = logging.getLogger("root")
+        self.events = 0
+        self.flushes = 0
+        # BaseMessageID: (StarMessageID, Stars)
+        self.index: LRUCache[int, tuple[t.Optional[int], int]] = LRUCache(index_size)
+        # StarMessageID: (BaseMessageID, base ChannelID)
+        self._posts: LRUCache[int, tuple[int, int]] = LRUCache(index_size)
+        self._pending: dict[int, PendingStars] = {}
+        self._timers: dict[int, asyncio.TimerHandle] = {}
+        self._flushing: dict[int, asyncio.Task[None]] = {}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def on_reaction_add(self, event: hikari.GuildReactionAddEvent) -> None:
+        """fires when a reaction is added to a guild message"""
+        if event.emoji_name == self.EMOJI:
+            self.add(event.guild_id, event.channel_id, event.message_id, 1)
+
+    async def on_reaction_delete(self, event: hikari.GuildReactionDeleteEvent) -> None:
+        """fires when a reaction is removed from a guild message"""
+        if event.emoji_name == self.EMOJI:
+            self.add(event.guild_id, event.channel_id, event.message_id, -1)
+
+    async def on_reaction_clear(
+        self,
+        event: t.Union[hikari.GuildReactionDeleteEmojiEvent, hikari.GuildReactionDeleteAllEvent],
+    ) -> None:
+        """fires when all reactions, or all of one emoji, are removed from a message"""
+        if getattr(event, "emoji_name", self.EMOJI) == self.EMOJI:
+            self.clear(event.guild_id, event.channel_id, event.message_id)
+
+    def stars(self, message_id: int) -> t.Optional[int]:
+        """Gets a messages star count from the index, or None if it isn't there."""
+        try:
+            return self.index[message_id][1]
+
+        except KeyError:
+            return None
+
+    def add(self, guild_id: int, channel_id: int, message_id: int, stars: int) -> None:
+        """Counts stars added to, or removed from, a message."""
+        if (pending := self._track(guild_id, channel_id, message_id)) is not None:
+            pending.delta += stars
+
+    def clear(self, guild_id: int, channel_id: int, message_id: int) -> None:
+        """Records that every star was removed from a message."""
+        if (pending := self._track(guild_id, channel_id, message_id)) is not None:
+            pending.delta = 0
+            pending.reset = True
+
+    async def flush(self) -> None:
+        """Writes every pending message right away, i.e. on shutdown."""
+        for timer in self._timers.values():
+            timer.cancel()
+
+        self._timers.clear()
+        await asyncio.gather(*(self._flush(m) for m in [*self._pending]))
+
+    def _track(self, guild_id: int, channel_id: int, message_id: int) -> t.Optional[PendingStars]:
+        guild = self.guilds.get(guild_id)
+
+        if guild is not None and not guild.star_channel:
+            return None
+
+        if message_id in self._posts:
+            message_id, channel_id = self._posts[message_id]
+
+        elif guild is not None and channel_id == guild.star_channel:
+            # Not a post we know about, i.e. one from before a restart
+            return None
+
+        self.events += 1
+
+        if (pending := self._pending.get(message_id)) is None:
+            pending = self._pending[message_id] = PendingStars(guild_id, channel_id)
+            self._timers[message_id] = asyncio.get_running_loop().call_later(
+                self.window, self._start_flush, message_id
+            )
+
+        return pending
+
+    def _start_flush(self, message_id: int) -> None:
+        self._timers.pop(message_id, None)
+        task = asyncio.create_task(self._flush(message_id))
+        task.add_done_callback(self._log_failure)
+
+    def _log_failure(self, task: asyncio.Task[None]) -> None:
+        if not task.cancelled() and (exc := task.exception()) is not None:
+            self.log.error(f"Starboard flush failed: {exc!r}")
+
+    async def _flush(self, message_id: int) -> None:
+        # Never have two flushes for a message at once, they'd both post it
+        if (previous := self._flushing.get(message_id)) is not None:
+            await asyncio.gather(previous, return_exceptions=True)
+
+        if (pending := self._pending.pop(message_id, None)) is None:
+            return None
+
+        if not pending.delta and not pending.reset:
+            # i.e. starred and unstarred in the same window
+            return None
+
+        if pending.delta <= 0 and self.stars(message_id) == 0:
+            # Known to have no stars or post, there is nothing to take away
+            return None
+
+        task = asyncio.create_task(self._apply(message_id, pending))
+        self._flushing[message_id] = task
+
+        try:
+            await task
+
+        finally:
+            if self._flushing.get(message_id) is task:
+                del self._flushing[message_id]
+
+    async def _apply(self, message_id: int, pending: PendingStars) -> None:
+        # The guild may not have been cached when it was starred, i.e. after a bus reset
+        guild = await self.guilds.fetch(pending.guild_id)
+
+        if not guild.star_channel or pending.channel_id == guild.star_channel:
+            return None
+
+        self.flushes += 1
+        star_message_id, stars = await self.pool.row(
+            self.UPSERT, message_id, pending.guild_id, pending.delta, pending.reset
+        ) or (None, 0)
+        self.index[message_id] = (star_message_id, stars)
+
+        if star_message_id is None:
+            if stars > 0:
+                await self._post(guild.star_channel, message_id, pending, stars)
+
+            return None
+
+        self._posts[star_message_id] = (message_id, pending.channel_id)
+
+        try:
+            if stars > 0:
+                await self.rest.edit_message(
+                    guild.star_channel, star_message_id, self._header(pending, stars)
+                )
+                return None
+
+            await self.rest.delete_message(guild.star_channel, star_message_id)
+            self._posts.pop(star_message_id)
+
+        except hikari.NotFoundError:
+            # Someone deleted the starboard message, post a fresh one
+            if stars > 0:
+                await self._post(guild.star_channel, message_id, pending, stars)
+                return None
+
+        await self.pool.execute(
+            "UPDATE starboard SET StarMessageID = NULL "
+            "WHERE BaseMessageID = $1 AND GuildID = $2;",
+            message_id,
+            pending.guild_id,
+        )
+        self.index[message_id] = (None, stars)
+
+    async def _post(
+        self, star_channel: int, message_id: int, pending: PendingStars, stars: int
+    ) -> None:
+        message = await self.rest.fetch_message(pending.channel_id, message_id)
+
+        embed = (
+            hikari.Embed(description=message.content or None, timestamp=message.timestamp)
+            .set_author(
+                name=message.author.username,
+                icon=message.author.avatar_url or message.author.default_avatar_url,
+            )
+            .add_field(
+                "Source",
+                f"[Jump to message](https://discord.com/channels/"
+                f"{pending.guild_id}/{pending.channel_id}/{message_id})",
+            )
+        )
+
+        if message.attachments:
+            embed.set_image(message.attachments[0].url)
+
+        star_message = await self.rest.create_message(
+            star_channel, self._header(pending, stars), embed=embed
+        )
+
+        await self.pool.execute(
+            "UPDATE starboard SET StarMessageID = $1 "
+            "WHERE BaseMessageID = $2 AND GuildID = $3;",
+            star_message.id,
+            message_id,
+            pending.guild_id,
+        )
+
+        self.index[message_id] = (star_message.id, stars)
+        self._posts[star_message.id] = (message_id, pending.channel_id)
+
+    def _header(self, pending: PendingStars, stars: int) -> str:
+        return f"{self.EMOJI} **{stars}** | <#{pending.channel_id}>"
@@ -1,5 +1,25 @@
 from .errors import Errors
+from .errors import PoolBusyError
 from .embeds import Embeds
 from .lines import Lines
+from .cache import LRUCache
+from .components import ComponentRouter
+from .piston import PistonError
+from .piston import PistonBusyError
+from .piston import PistonQueue
+from .piston import ResultCache
+from .piston import RuntimeCatalogue
 
-__all__ = ["Errors", "Embeds", "Lines"]
+__all__ = [
+    "Errors",
+    "PoolBusyError",
+    "Embeds",
+    "Lines",
+    "LRUCache",
+    "ComponentRouter",
+    "PistonError",
+    "PistonBusyError",
+    "PistonQueue",
+    "ResultCache",
+    "RuntimeCatalogue",
+]
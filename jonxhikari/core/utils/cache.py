@@ -0,0 +1,109 @@
+import collections
+import time
+import typing as t
+
+
+KeyT = t.TypeVar("KeyT", bound=t.Hashable)
+ValueT = t.TypeVar("ValueT")
+
+
+class LRUCache(t.Generic[KeyT, ValueT]):
+    """A bounded mapping that evicts the least recently used items.
+
+    Items can optionally expire `ttl` seconds after being set. Raises
+    `KeyError` on a miss just like a dict, so storing `None` can be
+    used as a negative entry for things known not to exist.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: t.Optional[float] = None) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._items: collections.OrderedDict[
+            KeyT, tuple[float, ValueT]
+        ] = collections.OrderedDict()
+        # Writes to each key being filled, and how many fills are waiting on it
+        self._generations: dict[KeyT, int] = {}
+        self._filling: dict[KeyT, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: object) -> bool:
+        if (item := self._items.get(key)) is None:  # type: ignore
+            return False
+
+        return not self._expired(item[0])
+
+    def __getitem__(self, key: KeyT) -> ValueT:
+        if (item := self._items.get(key)) is None or self._expired(item[0]):
+            self._items.pop(key, None)
+            self.misses += 1
+            raise KeyError(key)
+
+        self._items.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def __setitem__(self, key: KeyT, value: ValueT) -> None:
+        self._written(key)
+        expires = time.monotonic() + self.ttl if self.ttl is not None else 0.0
+        self._items[key] = (expires, value)
+        self._items.move_to_end(key)
+
+        if len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def __delitem__(self, key: KeyT) -> None:
+        del self._items[key]
+        self._written(key)
+
+    @property
+    def hit_rate(self) -> float:
+        """The percentage of lookups that were served from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total * 100 if total else 0.0
+
+    def _expired(self, expires: float) -> bool:
+        return self.ttl is not None and expires <= time.monotonic()
+
+    def _written(self, key: KeyT) -> None:
+        if key in self._generations:
+            self._generations[key] += 1
+
+    def pop(self, key: KeyT) -> None:
+        """Removes an item from the cache, if it is there."""
+        self._items.pop(key, None)
+        self._written(key)
+
+    def clear(self) -> None:
+        """Removes every item from the cache."""
+        self._items.clear()
+
+        for key in self._generations:
+            self._generations[key] += 1
+
+    async def fill(self, key: KeyT, load: t.Callable[[], t.Awaitable[ValueT]]) -> ValueT:
+        """Loads a missing item, and caches it.
+
+        If the key is set or removed while it loads, the loaded value may
+        already be stale, so it's returned without being cached.
+        """
+        generation = self._generations.setdefault(key, 0)
+        self._filling[key] = self._filling.get(key, 0) + 1
+
+        try:
+            value = await load()
+
+            if self._generations[key] == generation:
+                self[key] = value
+
+            return value
+
+        finally:
+            if (waiting := self._filling.pop(key) - 1) > 0:
+                self._filling[key] = waiting
+
+            else:
+                del self._generations[key]
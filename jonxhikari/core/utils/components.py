@@ -0,0 +1,123 @@
+import asyncio
+import contextlib
+import heapq
+import typing as t
+
+import hikari
+
+
+class ComponentListener:
+    """The component presses by one user on one message.
+
+    Iterate it to get each press, iteration stops once the listener
+    expires. The timeout restarts on every press.
+    """
+
+    __slots__ = ("message_id", "user_id", "timeout", "deadline", "_queue")
+
+    def __init__(self, message_id: int, user_id: int, timeout: float, deadline: float) -> None:
+        self.message_id = message_id
+        self.user_id = user_id
+        self.timeout = timeout
+        self.deadline = deadline
+        self._queue: asyncio.Queue[t.Optional[hikari.ComponentInteraction]] = asyncio.Queue()
+
+    def __aiter__(self) -> "ComponentListener":
+        return self
+
+    async def __anext__(self) -> hikari.ComponentInteraction:
+        if (interaction := await self._queue.get()) is None:
+            raise StopAsyncIteration
+
+        return interaction
+
+    async def wait(self) -> t.Optional[hikari.ComponentInteraction]:
+        """Waits for the next press, or None once the listener expires."""
+        return await self._queue.get()
+
+
+class ComponentRouter:
+    """Routes component interactions to whoever is waiting on that message.
+
+    Listeners are keyed by message id, so a press is a dict lookup no
+    matter how many prompts are open. Expiry runs off a single timer for
+    the earliest deadline in a heap, rather than a timer per prompt.
+    """
+
+    def __init__(self) -> None:
+        self._listeners: dict[int, ComponentListener] = {}
+        self._deadlines: list[tuple[float, int]] = []
+        self._timer: t.Optional[asyncio.TimerHandle] = None
+
+    def __len__(self) -> int:
+        return len(self._listeners)
+
+    @contextlib.asynccontextmanager
+    async def listen(
+        self,
+        message: hikari.SnowflakeishOr[hikari.PartialMessage],
+        user: hikari.SnowflakeishOr[hikari.PartialUser],
+        timeout: float = 30,
+    ) -> t.AsyncIterator[ComponentListener]:
+        """Listens for a users presses on a messages components."""
+        loop = asyncio.get_running_loop()
+        listener = ComponentListener(int(message), int(user), timeout, loop.time() + timeout)
+
+        self._listeners[listener.message_id] = listener
+        heapq.heappush(self._deadlines, (listener.deadline, listener.message_id))
+        self._schedule(loop)
+
+        try:
+            yield listener
+
+        finally:
+            # The heap entry is left behind, and skipped when it comes due
+            if self._listeners.get(listener.message_id) is listener:
+                del self._listeners[listener.message_id]
+
+    async def on_interaction(self, event: hikari.InteractionCreateEvent) -> None:
+        """Passes a component interaction to its listener, if there is one."""
+        if not isinstance(interaction := event.interaction, hikari.ComponentInteraction):
+            return None
+
+        listener = self._listeners.get(interaction.message.id)
+
+        if listener is None or listener.user_id != interaction.user.id:
+            return None
+
+        listener.deadline = asyncio.get_running_loop().time() + listener.timeout
+        listener._queue.put_nowait(interaction)
+
+    def _schedule(self, loop: asyncio.AbstractEventLoop) -> None:
+        if not self._deadlines:
+            return None
+
+        when = self._deadlines[0][0]
+
+        if self._timer is not None:
+            if self._timer.when() <= when:
+                return None
+
+            self._timer.cancel()
+
+        self._timer = loop.call_at(when, self._expire, loop)
+
+    def _expire(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._timer = None
+        now = loop.time()
+
+        while self._deadlines and self._deadlines[0][0] <= now:
+            _, message_id = heapq.heappop(self._deadlines)
+
+            if (listener := self._listeners.get(message_id)) is None:
+                continue
+
+            # Pressed since this entry was pushed, so check again later
+            if listener.deadline > now:
+                heapq.heappush(self._deadlines, (listener.deadline, message_id))
+                continue
+
+            del self._listeners[message_id]
+            listener._queue.put_nowait(None)
+
+        self._schedule(loop)
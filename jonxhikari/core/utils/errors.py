@@ -14,6 +14,10 @@ class WTFError(Exception):
     pass
 
 
+class PoolBusyError(Exception):
+    """Raised when a database connection can't be acquired in time."""
+
+
 class Errors:
     embeds = Embeds()
 
@@ -26,6 +30,9 @@ class Errors:
 
         return embed
 
+    def busy(self, ctx: DualCtxT) -> hikari.Embed:
+        return self.embed(ctx, "**BUSY**\nI'm handling a lot right now, try again in a moment.")
+
     @staticmethod
     def wtf(message: str) -> WTFError:
         return WTFError(message)
@@ -50,12 +57,25 @@ class Errors:
             print(exc)
             raise exc
 
+    async def tanjun_hook(self, ctx: tanjun.abc.Context, exc: Exception) -> t.Optional[bool]:
+        """Error hook for the slash client, suppresses the errors we expect."""
+        if isinstance(exc, PoolBusyError):
+            await ctx.respond(self.busy(ctx))
+            return True
+
+        return None
+
     async def parse_lightbulb(
         self, exc: t.Union[lb_errors.CommandError, Exception], ctx: lightbulb.Context
     ) -> None:
         if isinstance(exc, lb_errors.CommandNotFound):
             pass
 
+        elif isinstance(exc, lb_errors.CommandInvocationError) and isinstance(
+            exc.original, PoolBusyError
+        ):
+            await ctx.respond(self.busy(ctx))
+
         elif isinstance(exc, lb_errors.NotEnoughArguments):
             args = "\n".join(f" > {a}" for a in exc.args[1])
             await ctx.respond(
@@ -0,0 +1,391 @@
+import asyncio
+import collections
+import email.utils
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import time
+import typing as t
+from datetime import datetime, timezone
+from pathlib import Path
+
+import aiofiles
+import aiohttp
+
+
+RuntimeT = tuple[str, str]
+
+
+def _version_key(version: str) -> tuple[int, ...]:
+    return tuple(int(n) for n in re.findall(r"\d+", version))
+
+
+def _retry_after(value: t.Optional[str]) -> t.Optional[float]:
+    # Either a number of seconds or an HTTP date, None if it's neither
+    if not value:
+        return None
+
+    try:
+        return max(float(value), 0.0)
+
+    except ValueError:
+        pass
+
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+
+    except (TypeError, ValueError):
+        return None
+
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class RuntimeCatalogue:
+    """Every language Piston can run, by name and alias.
+
+    Maps each name and alias to its `(language, version)`, keeping the
+    newest version when there are several. The catalogue is saved to
+    disk after every refresh, so a cold start, or Piston being down,
+    still has the last list that worked.
+    """
+
+    def __init__(
+        self,
+        uri: str,
+        path: str = "./jonxhikari/data/cache/runtimes.json",
+        ttl: float = 3600.0,
+    ) -> None:
+        self.uri = uri
+        self.path = Path(path)
+        self.ttl = ttl
+        self.fetched_at = 0.0
+        self.log = logging.getLogger("root")
+        self._runtimes: dict[str, RuntimeT] = {}
+
+    def __len__(self) -> int:
+        return len(self._runtimes)
+
+    def __contains__(self, alias: object) -> bool:
+        return alias in self._runtimes
+
+    @property
+    def stale(self) -> bool:
+        """Whether the catalogue is older than its ttl."""
+        return time.time() - self.fetched_at > self.ttl
+
+    def resolve(self, alias: str) -> t.Optional[RuntimeT]:
+        """Gets the `(language, version)` for a name or alias."""
+        return self._runtimes.get(alias.lower())
+
+    def update(self, *runtimes: dict[str, t.Any]) -> None:
+        """Replaces the catalogue with raw runtime data from Piston."""
+        catalogue: dict[str, RuntimeT] = {}
+
+        for runtime in runtimes:
+            language, version = runtime["language"], runtime["version"]
+
+            for alias in (language, *runtime.get("aliases", ())):
+                current = catalogue.get(alias := alias.lower())
+
+                if current is None or _version_key(version) > _version_key(current[1]):
+                    catalogue[alias] = (language, version)
+
+        self._runtimes = catalogue
+
+    async def load(self, session: aiohttp.ClientSession) -> None:
+        """Loads the saved catalogue, then refreshes it if it's stale."""
+        if self.path.exists():
+            try:
+                async with aiofiles.open(self.path, "r", encoding="utf-8") as f:
+                    saved = json.loads(await f.read())
+
+                self._runtimes = {k: (v[0], v[1]) for k, v in saved["runtimes"].items()}
+                self.fetched_at = saved["fetched_at"]
+
+            except (OSError, ValueError, KeyError) as e:
+                self.log.warning(f"Ignoring unreadable runtime catalogue: {e!r}")
+
+        if self.stale:
+            await self.refresh(session)
+
+    async def refresh(self, session: aiohttp.ClientSession) -> bool:
+        """Fetches the runtimes from Piston. Returns whether it worked.
+
+        A failed refresh keeps the current catalogue.
+        """
+        try:
+            async with session.get(f"{self.uri}/runtimes") as response:
+                if not 200 <= response.status <= 299:
+                    self.log.warning(f"Piston runtimes returned {response.status}.")
+                    return False
+
+                data = await response.json()
+
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            self.log.warning(f"Couldn't fetch Piston runtimes: {e!r}")
+            return False
+
+        if not data:
+            return False
+
+        self.update(*data)
+        self.fetched_at = time.time()
+
+        try:
+            await self.save()
+
+        except OSError as e:
+            self.log.warning(f"Couldn't save the runtime catalogue: {e!r}")
+
+        return True
+
+    async def save(self) -> None:
+        """Writes the catalogue to disk, replacing the old one in one step."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp = self.path.with_suffix(".tmp")
+
+        async with aiofiles.open(temp, "w", encoding="utf-8") as f:
+            await f.write(json.dumps({"fetched_at": self.fetched_at, "runtimes": self._runtimes}))
+
+        os.replace(temp, self.path)
+
+
+class ResultCache:
+    """Piston results, keyed by a hash of what was run.
+
+    Only deterministic runs belong here, the same language, version and
+    source always give the same result. The least recently used results
+    are evicted once the cache holds more than `max_bytes` of output.
+    """
+
+    def __init__(self, max_bytes: int = 4 * 1024 * 1024) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._results: collections.OrderedDict[
+            str, tuple[int, dict[str, t.Any]]
+        ] = collections.OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    @staticmethod
+    def key(language: str, version: str, source: str) -> str:
+        """The content address of a run."""
+        return hashlib.sha256(f"{language}\0{version}\0{source}".encode()).hexdigest()
+
+    def get(self, key: str) -> t.Optional[dict[str, t.Any]]:
+        """Gets a cached result, or None."""
+        if (item := self._results.get(key)) is None:
+            self.misses += 1
+            return None
+
+        self._results.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def set(self, key: str, result: dict[str, t.Any]) -> None:
+        """Caches a result, evicting old ones to stay under `max_bytes`."""
+        if (size := len(json.dumps(result))) > self.max_bytes:
+            return None
+
+        if (old := self._results.pop(key, None)) is not None:
+            self.size -= old[0]
+
+        self._results[key] = (size, result)
+        self.size += size
+
+        while self.size > self.max_bytes:
+            _, (evicted, _) = self._results.popitem(last=False)
+            self.size -= evicted
+
+
+class PistonError(Exception):
+    """Raised when Piston can't run something."""
+
+
+class PistonBusyError(PistonError):
+    """Raised when the queue is full, or Piston is still rate limiting us after retries."""
+
+
+class PistonJob:
+    """One request waiting for Piston."""
+
+    __slots__ = ("key", "payload", "future")
+
+    def __init__(
+        self, key: str, payload: dict[str, t.Any], future: "asyncio.Future[t.Any]"
+    ) -> None:
+        self.key = key
+        self.payload = payload
+        self.future = future
+
+
+class PistonQueue:
+    """Sends runs to Piston without going over its rate limit.
+
+    At most `concurrency` requests are in flight at once. Waiting runs
+    are taken from each user in turn, so one user spamming `run` can't
+    starve everyone else. Identical runs already waiting or in flight
+    share one request, and 429s are retried with jittered backoff.
+    """
+
+    def __init__(
+        self,
+        uri: str,
+        session: aiohttp.ClientSession,
+        concurrency: int = 3,
+        max_depth: int = 100,
+        max_retries: int = 4,
+        backoff: float = 1.0,
+    ) -> None:
+        self.uri = uri
+        self.session = session
+        self.concurrency = concurrency
+        self.max_depth = max_depth
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.log = logging.getLogger("root")
+        self.depth = 0
+        self.peak_depth = 0
+        self.in_flight = 0
+        self.submitted = 0
+        self.deduped = 0
+        self.retries = 0
+        self.failures = 0
+        self._users: dict[int, collections.deque[PistonJob]] = {}
+        self._turns: collections.deque[int] = collections.deque()
+        self._jobs: dict[str, "asyncio.Future[t.Any]"] = {}
+        self._ready: t.Optional[asyncio.Queue[None]] = None
+        self._workers: list[asyncio.Task[None]] = []
+
+    def __len__(self) -> int:
+        return self.depth
+
+    async def execute(self, user_id: int, key: str, payload: dict[str, t.Any]) -> dict[str, t.Any]:
+        """Queues a run for a user, and waits for its result.
+
+        Raises `PistonBusyError` if the queue is full or Piston keeps
+        rate limiting us, or `PistonError` if the run fails.
+        """
+        if (future := self._jobs.get(key)) is not None:
+            self.deduped += 1
+            return t.cast(dict[str, t.Any], await asyncio.shield(future))
+
+        if self.depth >= self.max_depth:
+            raise PistonBusyError("Too many runs are waiting, try again in a moment.")
+
+        if self._ready is None:
+            self._start()
+
+        assert self._ready is not None
+        future = self._jobs[key] = asyncio.get_running_loop().create_future()
+        future.add_done_callback(lambda f: self._forget(key, f))
+
+        if user_id not in self._users:
+            self._users[user_id] = collections.deque()
+            self._turns.append(user_id)
+
+        self._users[user_id].append(PistonJob(key, payload, future))
+        self.submitted += 1
+        self.depth += 1
+        self.peak_depth = max(self.peak_depth, self.depth)
+        self._ready.put_nowait(None)
+
+        return t.cast(dict[str, t.Any], await asyncio.shield(future))
+
+    def close(self) -> None:
+        """Stops the workers, and fails anything waiting or in flight."""
+        for worker in self._workers:
+            worker.cancel()
+
+        # Every job has its future here, including those a worker already took
+        for future in self._jobs.values():
+            if not future.done():
+                future.set_exception(PistonError("The run queue was closed."))
+
+        self._workers.clear()
+        self._jobs.clear()
+        self._users.clear()
+        self._turns.clear()
+        self._ready = None
+        self.depth = 0
+
+    def _forget(self, key: str, future: "asyncio.Future[t.Any]") -> None:
+        # A closed queue may already have a new job under the same key
+        if self._jobs.get(key) is future:
+            del self._jobs[key]
+
+    def _start(self) -> None:
+        self._ready = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+
+    def _next(self) -> PistonJob:
+        # Round robin, whoever just had a turn goes to the back
+        user_id = self._turns.popleft()
+        jobs = self._users[user_id]
+        job = jobs.popleft()
+
+        if jobs:
+            self._turns.append(user_id)
+
+        else:
+            del self._users[user_id]
+
+        self.depth -= 1
+        return job
+
+    async def _work(self) -> None:
+        assert self._ready is not None
+
+        while True:
+            await self._ready.get()
+            job = self._next()
+            self.in_flight += 1
+
+            try:
+                job.future.set_result(await self._post(job.payload))
+
+            except PistonError as e:
+                self.failures += 1
+                job.future.set_exception(e)
+
+            except Exception as e:
+                self.failures += 1
+                job.future.set_exception(PistonError(f"Piston request failed: {e!r}"))
+
+            finally:
+                self.in_flight -= 1
+
+    async def _post(self, payload: dict[str, t.Any]) -> dict[str, t.Any]:
+        for attempt in range(self.max_retries + 1):
+            async with self.session.post(f"{self.uri}/execute", json=payload) as response:
+                if response.status != 429:
+                    if not 200 <= response.status <= 299:
+                        raise PistonError(f"Piston returned {response.status}, try again later.")
+
+                    if not (data := await response.json()):
+                        raise PistonError("Piston returned nothing.")
+
+                    return t.cast(dict[str, t.Any], data)
+
+                if attempt == self.max_retries:
+                    break
+
+                # Full jitter, so retries from every worker don't line up
+                delay = _retry_after(response.headers.get("Retry-After")) or random.uniform(
+                    0, self.backoff * 2 ** attempt
+                )
+
+            # Outside the response, so its connection goes back to the pool while we wait
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+        raise PistonBusyError("Piston is busy, try again in a moment.")
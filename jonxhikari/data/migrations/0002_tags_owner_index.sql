@@ -0,0 +1,3 @@
+-- no-transaction
+-- Used by `tag info member`, built without locking writes to tags.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS tags_guild_owner_idx ON tags (GuildID, TagOwner);
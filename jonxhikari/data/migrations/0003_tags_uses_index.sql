@@ -0,0 +1,3 @@
+-- no-transaction
+-- Used by `tag list` ordered by uses, to page through tags without an OFFSET.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS tags_guild_uses_idx ON tags (GuildID, Uses, TagName);
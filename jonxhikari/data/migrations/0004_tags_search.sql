@@ -0,0 +1,8 @@
+-- Kept current by Postgres on every insert and edit, names weigh more than content.
+-- Adding a stored generated column rewrites all of tags under an ACCESS EXCLUSIVE lock,
+-- so reads and writes to tags wait until it's done. On a large table, apply it while
+-- the bot is down.
+ALTER TABLE tags ADD COLUMN IF NOT EXISTS SearchVector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(TagName, '')), 'A')
+    || setweight(to_tsvector('english', coalesce(TagContent, '')), 'B')
+) STORED;
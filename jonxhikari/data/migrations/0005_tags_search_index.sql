@@ -0,0 +1,6 @@
+-- no-transaction
+-- Used by `tag search`, built without locking writes to tags. Every search filters on
+-- GuildID, so index it with the search vector. Only the guilds matching rows are read,
+-- rather than every guilds matches then filtered.
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS tags_guild_search_idx ON tags USING GIN (GuildID, SearchVector);
@@ -0,0 +1,228 @@
+"""Measures the memory hikari's cache uses per guild for each profile.
+
+Feeds the same fake GUILD_CREATE payloads to a hikari cache built with
+each profile's cache settings, the way the gateway would on startup.
+Members, presences and voice states are only in the payload when the
+profile has the intent that sends them, like on Discord. Messages are
+cached as they arrive rather than at startup, so they aren't counted.
+Run from the repository root:
+
+    python scripts/cache_memory.py [guilds]
+"""
+
+import importlib.util
+import sys
+import tracemalloc
+import typing as t
+from pathlib import Path
+
+import hikari
+from hikari.impl import cache as cache_impl
+from hikari.impl import entity_factory as entity_factory_impl
+
+# Load the module on its own, the package imports need the bot's dependencies
+spec = importlib.util.spec_from_file_location(
+    "config", Path(__file__).parents[1] / "jonxhikari" / "config.py"
+)
+assert spec is not None and spec.loader is not None
+config = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(config)
+
+# A mid sized guild
+CHANNELS = 40
+ROLES = 25
+EMOJIS = 30
+MEMBERS = 250
+ONLINE = 60
+IN_VOICE = 5
+
+
+def user(user_id: int) -> dict[str, t.Any]:
+    return {
+        "id": str(user_id),
+        "username": f"user{user_id}",
+        "discriminator": "0001",
+        "avatar": None,
+    }
+
+
+def member(user_id: int) -> dict[str, t.Any]:
+    return {
+        "user": user(user_id),
+        "roles": [],
+        "joined_at": "2021-08-01T00:00:00+00:00",
+        "deaf": False,
+        "mute": False,
+    }
+
+
+def guild(guild_id: int, intents: hikari.Intents) -> dict[str, t.Any]:
+    """A fake GUILD_CREATE payload, with what the intents would send."""
+    base = guild_id * 10_000
+    members = range(base + 1, base + MEMBERS + 1)
+
+    if not intents & hikari.Intents.GUILD_MEMBERS:
+        # Only the bot and members in voice are sent without the members intent
+        members = range(base + 1, base + IN_VOICE + 1)
+
+    return {
+        "id": str(guild_id),
+        "name": f"guild {guild_id}",
+        "icon": None,
+        "splash": None,
+        "discovery_splash": None,
+        "owner_id": str(base + 1),
+        "afk_channel_id": None,
+        "afk_timeout": 300,
+        "verification_level": 1,
+        "default_message_notifications": 1,
+        "explicit_content_filter": 0,
+        "features": [],
+        "mfa_level": 0,
+        "application_id": None,
+        "system_channel_id": None,
+        "system_channel_flags": 0,
+        "rules_channel_id": None,
+        "joined_at": "2021-08-01T00:00:00+00:00",
+        "large": False,
+        "unavailable": False,
+        "member_count": MEMBERS,
+        "vanity_url_code": None,
+        "description": None,
+        "banner": None,
+        "premium_tier": 0,
+        "preferred_locale": "en-US",
+        "public_updates_channel_id": None,
+        "nsfw_level": 0,
+        "roles": [
+            {
+                "id": str(base + 5000 + i),
+                "name": f"role {i}",
+                "color": 0,
+                "hoist": False,
+                "position": i,
+                "permissions": "0",
+                "managed": False,
+                "mentionable": False,
+            }
+            for i in range(ROLES)
+        ],
+        "emojis": [
+            {
+                "id": str(base + 6000 + i),
+                "name": f"emoji{i}",
+                "animated": False,
+                "roles": [],
+                "require_colons": True,
+                "managed": False,
+                "available": True,
+            }
+            for i in range(EMOJIS)
+        ],
+        "stickers": [],
+        "channels": [
+            {
+                "id": str(base + 7000 + i),
+                "type": 0,
+                "name": f"channel-{i}",
+                "position": i,
+                "permission_overwrites": [],
+                "nsfw": False,
+                "topic": None,
+                "last_message_id": None,
+                "rate_limit_per_user": 0,
+                "parent_id": None,
+            }
+            for i in range(CHANNELS)
+        ],
+        "threads": [],
+        "members": [member(i) for i in members],
+        "presences": [
+            {
+                "user": {"id": str(i)},
+                "guild_id": str(guild_id),
+                "status": "online",
+                "activities": [],
+                "client_status": {"desktop": "online"},
+            }
+            for i in range(base + 1, base + ONLINE + 1)
+        ]
+        if intents & hikari.Intents.GUILD_PRESENCES
+        else [],
+        "voice_states": [
+            {
+                "channel_id": str(base + 7000),
+                "user_id": str(i),
+                "session_id": f"session{i}",
+                "deaf": False,
+                "mute": False,
+                "self_deaf": False,
+                "self_mute": False,
+                "self_video": False,
+                "suppress": False,
+                "request_to_speak_timestamp": None,
+            }
+            for i in range(base + 1, base + IN_VOICE + 1)
+        ]
+        if intents & hikari.Intents.GUILD_VOICE_STATES
+        else [],
+    }
+
+
+def part(data: t.Any, name: str) -> t.Any:
+    """Gets part of a deserialized guild, newer hikari builds them lazily."""
+    value = getattr(data, name)
+    return value() if callable(value) else value
+
+
+def measure(profile: t.Any, count: int) -> float:
+    payloads = [guild(guild_id, profile.intents) for guild_id in range(1, count + 1)]
+    app = object()
+    factory = entity_factory_impl.EntityFactoryImpl(app)  # type: ignore
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    cache = cache_impl.CacheImpl(app, profile.cache)  # type: ignore
+
+    for payload in payloads:
+        # What the event manager does with a GUILD_CREATE
+        data = factory.deserialize_gateway_guild(payload)
+        cache.update_guild(part(data, "guild"))
+
+        for channel in part(data, "channels").values():
+            cache.set_guild_channel(channel)
+
+        for emoji in part(data, "emojis").values():
+            cache.set_emoji(emoji)
+
+        for role in part(data, "roles").values():
+            cache.set_role(role)
+
+        for guild_member in part(data, "members").values():
+            cache.set_member(guild_member)
+
+        for presence in part(data, "presences").values():
+            cache.set_presence(presence)
+
+        for voice_state in part(data, "voice_states").values():
+            cache.set_voice_state(voice_state)
+
+        del data
+
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    return sum(stat.size_diff for stat in after.compare_to(before, "filename")) / count
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+    print(f"{count:,} guilds, hikari {hikari.__version__}, Python {sys.version.split()[0]}")
+
+    for name, profile in config.PROFILES.items():
+        print(f"{name:<10} {measure(profile, count) / 1024:,.1f} KiB/guild")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Measures the memory GuildCache uses per guild.
+
+Compares a dict per guild, the way guild prefixes used to be cached,
+with the slotted `GuildSettings` records used now. Keys are excluded,
+since both store them the same way. Run from the repository root:
+
+    python scripts/guild_memory.py [guilds]
+"""
+
+import importlib.util
+import random
+import sys
+import tracemalloc
+import typing as t
+from pathlib import Path
+
+# Load the module on its own, the package imports need the bot's dependencies
+spec = importlib.util.spec_from_file_location(
+    "guilds", Path(__file__).parents[1] / "jonxhikari" / "core" / "db" / "guilds.py"
+)
+assert spec is not None and spec.loader is not None
+guilds = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(guilds)
+
+CUSTOM_PREFIXES = 0.02
+
+
+def rows(count: int) -> list[tuple[str, int]]:
+    """Fake guild rows, with a new string per custom prefix like asyncpg returns."""
+    rng = random.Random(0)
+    data = []
+
+    for _ in range(count):
+        if rng.random() < CUSTOM_PREFIXES:
+            data.append(("".join(rng.choice("!?.>-") for _ in range(2)), 0))
+
+        else:
+            data.append(("$", 0))
+
+    return data
+
+
+def measure(build: t.Callable[[list[tuple[str, int]]], list[t.Any]], count: int) -> float:
+    data = rows(count)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    values = build(data)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    # Don't count the list holding them, the cache's dict holds them instead
+    size -= sys.getsizeof(values)
+    return size / count
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    old = measure(lambda data: [{"prefix": prefix} for prefix, _ in data], count)
+    new = measure(lambda data: [guilds.GuildSettings(*row) for row in data], count)
+
+    print(f"{count:,} guilds, Python {sys.version.split()[0]}")
+    print(f"dict per guild (prefix only):         {old:.0f} bytes/guild")
+    print(f"GuildSettings (prefix, star channel): {new:.0f} bytes/guild")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Times `GuildTags` fuzzy lookups, and building their index.
+
+Uses two sets of names, random letters, and names made of a few common
+words like real tags (`rule-1`, `rules-voice`, ...), which share a lot
+of trigrams. Each lookup is a name with two letters swapped. Run from
+the repository root:
+
+    python scripts/tag_similarity.py [names]
+"""
+
+import asyncio
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parents[1]))
+
+from jonxhikari.core.db.tags import GuildTags
+
+WORDS = (
+    "rule rules voice role help info faq bot music python java code error setup guide link "
+    "invite server channel ban kick mute warn event game stream art meme photo news update log "
+    "welcome intro ticket support report staff mod admin apply verify pin react emoji color "
+    "colour level rank xp bump"
+).split()
+
+LOOKUPS = 500
+
+
+def random_names(count: int, rng: random.Random) -> list[str]:
+    names: set[str] = set()
+
+    while len(names) < count:
+        names.add("".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 12))))
+
+    return list(names)
+
+
+def word_names(count: int, rng: random.Random) -> list[str]:
+    names: set[str] = set()
+
+    while len(names) < count:
+        if (kind := rng.random()) < 0.3:
+            names.add(f"{rng.choice(WORDS)}-{rng.randint(1, 999)}")
+
+        elif kind < 0.7:
+            names.add(f"{rng.choice(WORDS)}-{rng.choice(WORDS)}")
+
+        else:
+            names.add(f"{rng.choice(WORDS)}-{rng.choice(WORDS)}-{rng.randint(1, 99)}")
+
+    return list(names)
+
+
+async def measure(names: list[str], rng: random.Random) -> tuple[float, float]:
+    tags = GuildTags(names)
+    start = time.perf_counter()
+    await tags.build()
+    build = time.perf_counter() - start
+
+    lookups = [name[:2] + name[3] + name[2] + name[4:] for name in rng.choices(names, k=LOOKUPS)]
+    start = time.perf_counter()
+
+    for name in lookups:
+        tags.similar(name, 5, 0.25)
+
+    return build, (time.perf_counter() - start) / LOOKUPS
+
+
+async def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    rng = random.Random(0)
+
+    print(f"{count:,} names, Python {sys.version.split()[0]}")
+
+    for kind, names in (
+        ("random", random_names(count, rng)),
+        ("words", word_names(count, rng)),
+    ):
+        build, lookup = await measure(names, rng)
+        print(f"{kind:<7} build {build * 1000:,.0f} ms, lookup {lookup * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,59 @@
+import asyncio
+import typing as t
+import unittest
+
+from jonxhikari.core.db.guilds import GuildCache
+
+
+class FlakyPool:
+    """Fails the first `failures` registrations, then returns the default rows."""
+
+    def __init__(self, failures: int) -> None:
+        self.failures = failures
+        self.calls = 0
+
+    async def rows(self, _: str, guild_ids: list[int]) -> list[tuple[t.Any, ...]]:
+        self.calls += 1
+
+        if self.calls <= self.failures:
+            raise OSError("connection refused")
+
+        return [(guild_id, "$", None) for guild_id in guild_ids]
+
+
+class GuildCacheTests(unittest.IsolatedAsyncioTestCase):
+    async def test_failed_batch_retries_without_new_guilds(self) -> None:
+        pool = FlakyPool(failures=2)
+        guilds = GuildCache(pool, batch_window=0.01, max_backoff=0.05)  # type: ignore
+
+        guilds.queue(1)
+        guilds.queue(2)
+
+        for _ in range(100):
+            if 1 in guilds and 2 in guilds:
+                break
+
+            await asyncio.sleep(0.01)
+
+        self.assertEqual(pool.calls, 3)
+        self.assertEqual(guilds.get_prefix(1), "$")
+        self.assertEqual(guilds.get_prefix(2), "$")
+
+    async def test_failed_load_is_retried_in_a_batch(self) -> None:
+        pool = FlakyPool(failures=1)
+        guilds = GuildCache(pool, batch_window=0.01, max_backoff=0.05)  # type: ignore
+
+        with self.assertRaises(OSError):
+            await guilds.fetch(1)
+
+        for _ in range(100):
+            if 1 in guilds:
+                break
+
+            await asyncio.sleep(0.01)
+
+        self.assertEqual(guilds.get_prefix(1), "$")
+
+
+if __name__ == "__main__":
+    unittest.main()
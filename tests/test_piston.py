@@ -0,0 +1,88 @@
+import asyncio
+import typing as t
+import unittest
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from jonxhikari.core.utils.piston import PistonBusyError, PistonQueue
+
+
+class PistonQueueTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        # Status codes to answer with before succeeding, and every source we were sent
+        self.statuses: list[int] = []
+        self.sources: list[str] = []
+
+        app = web.Application()
+        app.router.add_post("/execute", self.execute)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.session = aiohttp.ClientSession()
+
+    async def asyncTearDown(self) -> None:
+        await self.session.close()
+        await self.server.close()
+
+    async def execute(self, request: web.Request) -> web.Response:
+        source = (await request.json())["files"][0]["content"]
+        self.sources.append(source)
+
+        if self.statuses:
+            return web.Response(status=self.statuses.pop(0), headers={"Retry-After": "0.01"})
+
+        # Gives the other requests a chance to queue up behind this one
+        await asyncio.sleep(0.01)
+        return web.json_response({"run": {"stdout": source}})
+
+    def queue(self, **kwargs: t.Any) -> PistonQueue:
+        queue = PistonQueue(str(self.server.make_url("")), self.session, **kwargs)
+        self.addCleanup(queue.close)
+        return queue
+
+    @staticmethod
+    def payload(source: str) -> dict[str, t.Any]:
+        return {"language": "python", "version": "3.10.0", "files": [{"content": source}]}
+
+    async def test_users_take_turns(self) -> None:
+        queue = self.queue(concurrency=1)
+        runs = [(1, "a1"), (1, "a2"), (1, "a3"), (2, "b1"), (3, "c1")]
+
+        await asyncio.gather(*(queue.execute(u, s, self.payload(s)) for u, s in runs))
+
+        self.assertEqual(self.sources, ["a1", "b1", "c1", "a2", "a3"])
+
+    async def test_identical_runs_share_a_request(self) -> None:
+        queue = self.queue()
+
+        results = await asyncio.gather(
+            queue.execute(1, "key", self.payload("same")),
+            queue.execute(2, "key", self.payload("same")),
+        )
+
+        self.assertEqual(self.sources, ["same"])
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(queue.deduped, 1)
+
+    async def test_rate_limits_are_retried(self) -> None:
+        queue = self.queue(max_retries=2)
+        self.statuses = [429, 429]
+
+        result = await queue.execute(1, "key", self.payload("retried"))
+
+        self.assertEqual(result["run"]["stdout"], "retried")
+        self.assertEqual(queue.retries, 2)
+
+    async def test_rate_limited_after_retries_is_busy(self) -> None:
+        queue = self.queue(max_retries=2)
+        self.statuses = [429, 429, 429]
+
+        with self.assertRaises(PistonBusyError):
+            await queue.execute(1, "key", self.payload("limited"))
+
+        self.assertEqual(len(self.sources), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import random
+import unittest
+
+from jonxhikari.core.db.tags import GuildTags, TagIndex, trigrams
+
+
+def jaccard(a: str, b: str) -> float:
+    shared = len(trigrams(a) & trigrams(b))
+    return shared / (len(trigrams(a)) + len(trigrams(b)) - shared)
+
+
+class GuildTagsSimilarTests(unittest.IsolatedAsyncioTestCase):
+    async def test_matches_scoring_every_name(self) -> None:
+        rng = random.Random(0)
+        words = ("rule", "rules", "voice", "role", "help", "python", "java", "music", "bot")
+        names = list(
+            {f"{rng.choice(words)}-{rng.choice(words)}-{rng.randint(1, 9)}" for _ in range(500)}
+        )
+        tags = GuildTags(names)
+        await tags.build()
+
+        # Changes after the build go through the same index
+        for name in names[:50]:
+            tags.remove(name)
+
+        tags.add("python-voice")
+        names = tags.names
+
+        for name in rng.sample(names, 50):
+            query = name[:2] + name[3] + name[2] + name[4:]
+            expected = sorted(
+                (jaccard(query, n) for n in names if jaccard(query, n) >= 0.3), reverse=True
+            )
+            found = tags.similar(query, 5, 0.3)
+
+            self.assertEqual([jaccard(query, n) for n in found], expected[:5])
+
+    async def test_removed_names_are_not_suggested(self) -> None:
+        tags = GuildTags(["python", "pythons"])
+        await tags.build()
+        tags.remove("pythons")
+
+        self.assertEqual(tags.similar("pythno", 5, 0.2), ["python"])
+
+
+class FakePool:
+    def __init__(self, names: list[str]) -> None:
+        self.names = names
+
+    async def column(self, _: str, __: int) -> list[str]:
+        return self.names
+
+
+class TagIndexSimilarTests(unittest.IsolatedAsyncioTestCase):
+    async def test_swapped_letters_match(self) -> None:
+        index = TagIndex(FakePool(["python", "java", "rules"]))  # type: ignore
+
+        self.assertEqual(await index.similar(1, "pyhton"), ["python"])
+
+
+if __name__ == "__main__":
+    unittest.main()